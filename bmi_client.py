@@ -1,30 +1,54 @@
 import asyncio
-from openai import OpenAI
-from mcp import ClientSession, StdioServerParameters
-from mcp.client.stdio import stdio_client
+import functools
 import os
 import json
-server_params = StdioServerParameters(command="/Users/balachandarramalingam/Projects/TestMCPServer-SSEinPython/TestMCPServer-SSEinPython/venv/bin/python", args=[
-                                      "/Users/balachandarramalingam/Projects/TestMCPServer-SSEinPython/TestMCPServer-SSEinPython/bmi_server.py"])
+import re
 
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
 
-def llm_client(message: str):
+# The model often wraps the tool-call object in prose or code fences;
+# only the outermost {...} span is handed to the JSON parser
+_JSON_OBJECT_RE = re.compile(r"\{.*\}", re.DOTALL)
+
+# MCP server launched over stdio by run()
+SERVER_COMMAND = "/Users/balachandarramalingam/Projects/TestMCPServer-SSEinPython/TestMCPServer-SSEinPython/venv/bin/python"
+SERVER_ARGS = [
+    "/Users/balachandarramalingam/Projects/TestMCPServer-SSEinPython/TestMCPServer-SSEinPython/bmi_server.py"]
+
+
+@functools.lru_cache(maxsize=None)
+def get_openai_client():
     """
-    Send a message to the LLM and return the response.
+    Return the shared OpenAI client, creating it on first use.
+
+    openai is imported here so importing this module for its helpers
+    doesn't pay for the SDK's import graph; the cached client keeps
+    reusing one HTTP connection pool across llm_client calls.
     """
+    from openai import OpenAI
+
     # Initialize the OpenAI client from environment variable
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         raise EnvironmentError(
             "Missing OPENAI_API_KEY environment variable for OpenAI client")
-    openai_client = OpenAI(api_key=api_key)
+    return OpenAI(api_key=api_key)
+
 
+def llm_client(message: str):
+    """
+    Send a message to the LLM and return the response.
+    """
     # Send the message to the LLM
-    response = openai_client.chat.completions.create(
+    response = get_openai_client().chat.completions.create(
         model="gpt-4o-mini",
         messages=[{"role": "system",
-                   "content": "You are an intelligent assistant. You will execute tasks as prompted",
-                   "role": "user", "content": message}],
+                   "content": "You are an intelligent assistant. You will execute tasks as prompted"},
+                  {"role": "user", "content": message}],
         max_tokens=250,
         temperature=0.2
     )
@@ -33,26 +57,49 @@ def llm_client(message: str):
     return response.choices[0].message.content.strip()
 
 
+# Static parts of the tool-selection prompt; only the tool list and the
+# question are spliced in per call
+_PROMPT_HEADER = "You are a helpful assistant with access to these tools:\n\n"
+_PROMPT_QUESTION = ("Choose the appropriate tool based on the user's question. \n"
+                    "User's Question: ")
+_PROMPT_FOOTER = ("If no tool is needed, reply directly.\n\n"
+                  "IMPORTANT: When you need to use a tool, you must ONLY respond with "
+                  "the exact JSON object format below, nothing else:\n"
+                  "Keep the values in str "
+                  "{\n"
+                  '    "tool": "tool-name",\n'
+                  '    "arguments": {\n'
+                  '        "argument-name": "value"\n'
+                  "    }\n"
+                  "}\n\n")
+
+# Description of the most recently seen tool list. A session passes the
+# same list object for every query, so an identity check is enough.
+_described_tools = None
+_tools_description = ""
+
+
+def describe_tools(tools):
+    """Render the tool list for the prompt, reusing the last rendering"""
+    global _described_tools, _tools_description
+    if tools is not _described_tools:
+        _tools_description = "\n".join(
+            [f"- {tool.name}, {tool.description}, {tool.inputSchema} " for tool in tools])
+        _described_tools = tools
+    return _tools_description
+
+
 def get_prompt_to_identify_tool_and_arguments(query, tools):
-    tools_description = "\n".join(
-        [f"- {tool.name}, {tool.description}, {tool.inputSchema} " for tool in tools])
-    return ("You are a helpful assistant with access to these tools:\n\n"
-            f"{tools_description}\n"
-            "Choose the appropriate tool based on the user's question. \n"
-            f"User's Question: {query}\n"
-            "If no tool is needed, reply directly.\n\n"
-            "IMPORTANT: When you need to use a tool, you must ONLY respond with "
-            "the exact JSON object format below, nothing else:\n"
-            "Keep the values in str "
-            "{\n"
-            '    "tool": "tool-name",\n'
-            '    "arguments": {\n'
-            '        "argument-name": "value"\n'
-            "    }\n"
-            "}\n\n")
+    return (_PROMPT_HEADER + describe_tools(tools) + "\n" +
+            _PROMPT_QUESTION + f"{query}\n" + _PROMPT_FOOTER)
 
 
 async def run(query: str):
+    from mcp import ClientSession, StdioServerParameters
+    from mcp.client.stdio import stdio_client
+
+    server_params = StdioServerParameters(
+        command=SERVER_COMMAND, args=SERVER_ARGS)
     async with stdio_client(server_params) as (read, write):
         async with ClientSession(read, write) as session:
 
@@ -69,7 +116,8 @@ async def run(query: str):
             llm_response = llm_client(prompt)
             print(f"LLM Response: {llm_response}")
 
-            tool_call = json.loads(llm_response)
+            match = _JSON_OBJECT_RE.search(llm_response)
+            tool_call = _json_loads(match.group(0) if match else llm_response)
 
             result = await session.call_tool(tool_call["tool"], arguments=tool_call["arguments"])
 
@@ -78,7 +126,6 @@ async def run(query: str):
 
 
 if __name__ == "__main__":
-    import asyncio
     query = "Calculate BMI for height 5ft 10inches and weight 70kg"
     print(f"Sending query: {query}")
     result = asyncio.run(run(query))
@@ -1,13 +1,28 @@
 from mcp.server.fastmcp import FastMCP
-import math
 import pyodbc
 import asyncio
+import contextlib
+import functools
+import io
 import os
+import queue
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Union, Optional
 import json
 
 mcp = FastMCP("BMI & SQL Server")
 
+# Tool results are parsed by MCP clients, not read by people, so encode
+# compactly. default=str covers datetime/Decimal/GUID values from SQL Server.
+# One shared encoder avoids json.dumps building a new one per call.
+_json = json.JSONEncoder(separators=(",", ":"), default=str).encode
+
+# Let the ODBC driver manager cache handles keyed by connection string.
+# Must be set before the first pyodbc.connect() call.
+pyodbc.pooling = True
+
 print(f"Starting server {mcp.name}")
 
 # SQL Server Configuration - Using Docker config for local testing
@@ -33,9 +48,14 @@ except ImportError:
 
 def get_connection_string(config_name: str = None) -> str:
     """Generate SQL Server connection string using configuration system"""
+    return _build_connection_string(config_name or CURRENT_SQL_CONFIG)
+
+
+@functools.lru_cache(maxsize=8)
+def _build_connection_string(config_name: str) -> str:
+    """Build (once per configuration) the connection string for config_name"""
     try:
-        config_to_use = config_name or CURRENT_SQL_CONFIG
-        return get_connection_string_for_config(config_to_use)
+        return get_connection_string_for_config(config_name)
     except (NameError, ImportError):
         # Fallback to manual configuration
         connection_timeout = SQL_CONFIG['timeout']
@@ -65,6 +85,64 @@ def get_alternative_connection_string() -> str:
     )
 
 
+# Process-wide pool of live connections so sequential tool calls reuse an
+# already authenticated session instead of repeating the login handshake
+SQL_POOL_SIZE = 10
+_connection_pool = queue.Queue(maxsize=SQL_POOL_SIZE)
+
+
+def reset_connection_pool() -> None:
+    """Close and discard every pooled connection (e.g. after a config switch)"""
+    while True:
+        try:
+            cnxn = _connection_pool.get_nowait()
+        except queue.Empty:
+            return
+        try:
+            cnxn.close()
+        except pyodbc.Error:
+            pass
+
+
+@contextlib.contextmanager
+def get_conn():
+    """
+    Borrow a SQL Server connection from the pool, opening one if none is idle.
+
+    The connection is returned to the pool on success and closed on error,
+    so a broken connection is never handed out again.
+    """
+    try:
+        cnxn = _connection_pool.get_nowait()
+    except queue.Empty:
+        # Autocommit keeps an idle pooled connection from sitting in an open
+        # implicit transaction (holding locks) until its next borrower
+        cnxn = pyodbc.connect(get_connection_string(), autocommit=True)
+
+    try:
+        yield cnxn
+    except Exception:
+        cnxn.close()
+        raise
+
+    try:
+        _connection_pool.put_nowait(cnxn)
+    except queue.Full:
+        cnxn.close()
+
+
+# Dedicated worker threads for blocking pyodbc calls, sized to the
+# connection pool so every worker can hold a pooled connection. pyodbc
+# releases the GIL inside the driver, so queries overlap with the event loop.
+_SQL_EXECUTOR = ThreadPoolExecutor(
+    max_workers=SQL_POOL_SIZE, thread_name_prefix="sql")
+
+
+async def run_sql(func, *args):
+    """Run a blocking SQL helper on the SQL worker threads and await its result"""
+    return await asyncio.get_running_loop().run_in_executor(_SQL_EXECUTOR, func, *args)
+
+
 @mcp.tool()
 def calculate_bmi(weight_kg: float, height_m: float) -> float:
     """
@@ -72,16 +150,26 @@ def calculate_bmi(weight_kg: float, height_m: float) -> float:
     """
     if height_m <= 0:
         raise ValueError("Height must be greater than zero.")
-    return weight_kg / (height_m ** 2)
+    return weight_kg / (height_m * height_m)
+
+
+# Reachability doesn't change from one call to the next, so a successful
+# probe is reused for this many seconds before the server is dialled again.
+# Failures are never cached, so the server is seen again as soon as it is back.
+NETWORK_PROBE_TTL = 30  # seconds
+NETWORK_PROBE_TIMEOUT = 5  # seconds
+_network_probe_cache = None  # (monotonic timestamp, JSON result)
 
 
 @mcp.tool()
-def test_network_connectivity() -> str:
+async def test_network_connectivity() -> str:
     """
     Test network connectivity to the SQL Server
     """
-    import socket
-    import time
+    global _network_probe_cache
+
+    if _network_probe_cache and time.monotonic() - _network_probe_cache[0] < NETWORK_PROBE_TTL:
+        return _network_probe_cache[1]
 
     server_host = SQL_CONFIG['server']
     port = 1433  # Default SQL Server port
@@ -95,43 +183,41 @@ def test_network_connectivity() -> str:
     }
 
     try:
-        # Test TCP connection
-        start_time = time.time()
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(10)  # 10 second timeout
-
-        connection_result = sock.connect_ex((server_host, port))
-        end_time = time.time()
+        # Test TCP connection without blocking the event loop
+        start_time = time.perf_counter()
+        _, writer = await asyncio.wait_for(
+            asyncio.open_connection(server_host, port), NETWORK_PROBE_TIMEOUT)
+        end_time = time.perf_counter()
 
-        sock.close()
+        writer.close()
+        await writer.wait_closed()
 
-        if connection_result == 0:
-            result["reachable"] = True
-            result["response_time_ms"] = round(
-                (end_time - start_time) * 1000, 2)
-        else:
-            result["error"] = f"Connection failed with code: {connection_result}"
+        result["reachable"] = True
+        result["response_time_ms"] = round(
+            (end_time - start_time) * 1000, 2)
 
+    except asyncio.TimeoutError:
+        result["error"] = f"Connection timed out after {NETWORK_PROBE_TIMEOUT}s"
     except Exception as e:
         result["error"] = str(e)
 
-    return json.dumps(result, indent=2)
+    response = _json(result)
+    if result["reachable"]:
+        _network_probe_cache = (time.monotonic(), response)
+    return response
 
 
-@mcp.tool()
-def test_sql_connection() -> str:
-    """
-    Test the SQL Server connection and return connection status
-    """
+def _test_sql_connection() -> str:
+    """Blocking body of test_sql_connection, run off the event loop"""
     try:
-        connection_string = get_connection_string()
-        cnxn = pyodbc.connect(connection_string)
-        cursor = cnxn.cursor()
+        with get_conn() as cnxn:
+            cursor = cnxn.cursor()
 
-        # Test with a simple query
-        cursor.execute(
-            "SELECT @@VERSION as server_version, DB_NAME() as database_name")
-        row = cursor.fetchone()
+            # Test with a simple query
+            cursor.execute(
+                "SELECT @@VERSION as server_version, DB_NAME() as database_name")
+            row = cursor.fetchone()
+            cursor.close()
 
         result = {
             "status": "success",
@@ -141,10 +227,7 @@ def test_sql_connection() -> str:
             "server": SQL_CONFIG['server'],
             "database": SQL_CONFIG['database']
         }
-
-        cursor.close()
-        cnxn.close()
-        return json.dumps(result, indent=2)
+        return _json(result)
 
     except Exception as e:
         result = {
@@ -154,71 +237,80 @@ def test_sql_connection() -> str:
             "server": SQL_CONFIG['server'],
             "database": SQL_CONFIG['database']
         }
-        return json.dumps(result, indent=2)
+        return _json(result)
 
 
 @mcp.tool()
-def query_sql_server(query: str) -> str:
+async def test_sql_connection() -> str:
     """
-    Executes a read-only SQL SELECT query against a SQL Server database
-    and returns the results as a list of dictionaries.
+    Test the SQL Server connection and return connection status
+    """
+    return await run_sql(_test_sql_connection)
 
-    Args:
-        query: SQL SELECT query to execute (must be read-only)
 
-    Returns:
-        List of dictionaries with query results or error dict
-    """
-    # Basic safety check - only allow SELECT statements
-    query_trimmed = query.strip().upper()
-    if not query_trimmed.startswith('SELECT'):
-        return json.dumps({"error": "Only SELECT queries are allowed for security reasons"}, indent=2)
+# Read-only guard for query_sql_server. Word boundaries keep column names
+# such as CREATED_AT or UPDATED_BY from tripping the keyword check.
+_SELECT_RE = re.compile(r"^\s*SELECT\b", re.IGNORECASE)
+_DANGEROUS_RE = re.compile(
+    r"\b(DROP|DELETE|INSERT|UPDATE|ALTER|CREATE|TRUNCATE|EXEC|EXECUTE|MERGE|GRANT|REVOKE)\b",
+    re.IGNORECASE)
 
-    # Check for potentially dangerous keywords
-    dangerous_keywords = ['DROP', 'DELETE', 'INSERT',
-                          'UPDATE', 'ALTER', 'CREATE', 'TRUNCATE']
-    if any(keyword in query_trimmed for keyword in dangerous_keywords):
-        return json.dumps({"error": "Query contains potentially dangerous keywords. Only SELECT queries are allowed."}, indent=2)
+# Rows pulled from the cursor per fetchmany() round
+QUERY_FETCH_BATCH = 1000
+# Hard cap on rows returned by one query_sql_server call
+QUERY_MAX_ROWS = 10_000
 
-    try:
-        connection_string = get_connection_string()
-        cnxn = pyodbc.connect(connection_string)
-        cursor = cnxn.cursor()
 
-        cursor.execute(query)
-
-        # Get column names
-        columns = [column[0]
-                   for column in cursor.description] if cursor.description else []
-
-        # Fetch results
-        results = []
-        rows = cursor.fetchall()
-
-        for row in rows:
-            # Convert row to dictionary
-            row_dict = {}
-            for i, value in enumerate(row):
-                # Handle different data types
-                if value is None:
-                    row_dict[columns[i]] = None
-                elif isinstance(value, (int, float, str, bool)):
-                    row_dict[columns[i]] = value
-                else:
-                    # Convert other types to string
-                    row_dict[columns[i]] = str(value)
-            results.append(row_dict)
+def _query_sql_server(query: str) -> str:
+    """Blocking body of query_sql_server, run off the event loop"""
+    # Basic safety check - only allow SELECT statements
+    if not _SELECT_RE.match(query):
+        return _json({"error": "Only SELECT queries are allowed for security reasons"})
 
-        cursor.close()
-        cnxn.close()
+    # Check for potentially dangerous keywords
+    if _DANGEROUS_RE.search(query):
+        return _json({"error": "Query contains potentially dangerous keywords. Only SELECT queries are allowed."})
 
-        result = {
-            "status": "success",
-            "row_count": len(results),
-            "columns": columns,
-            "data": results
-        }
-        return json.dumps(result, indent=2)
+    try:
+        with get_conn() as cnxn:
+            cursor = cnxn.cursor()
+
+            cursor.execute(query)
+            # Larger blocks per fetchmany() mean fewer TDS round-trips
+            cursor.arraysize = QUERY_FETCH_BATCH
+
+            # Get column names
+            columns = tuple(column[0]
+                            for column in cursor.description) if cursor.description else ()
+
+            # Encode rows batch by batch straight into the response so the
+            # result set is never held as rows, dicts and JSON all at once
+            out = io.StringIO()
+            out.write('{"status":"success","columns":')
+            out.write(_json(columns))
+            out.write(',"data":[')
+            row_count = 0
+            truncated = False
+
+            while columns:
+                rows = cursor.fetchmany(
+                    min(QUERY_FETCH_BATCH, QUERY_MAX_ROWS - row_count))
+                if not rows:
+                    break
+                for row in rows:
+                    if row_count:
+                        out.write(',')
+                    out.write(_json(dict(zip(columns, row))))
+                    row_count += 1
+                if row_count >= QUERY_MAX_ROWS:
+                    # Stop transferring rows; just check whether any were left
+                    truncated = cursor.fetchone() is not None
+                    break
+
+            cursor.close()
+
+        out.write(f'],"row_count":{row_count},"truncated":{_json(truncated)}}}')
+        return out.getvalue()
 
     except Exception as e:
         result = {
@@ -226,111 +318,132 @@ def query_sql_server(query: str) -> str:
             "error": str(e),
             "query": query
         }
-        return json.dumps(result, indent=2)
+        return _json(result)
 
 
 @mcp.tool()
-def get_table_list() -> str:
+async def query_sql_server(query: str) -> str:
     """
-    Get a list of all tables in the current database
+    Executes a read-only SQL SELECT query against a SQL Server database
+    and returns the results as a list of dictionaries.
+
+    Args:
+        query: SQL SELECT query to execute (must be read-only)
+
+    Returns:
+        List of dictionaries with query results or error dict. At most
+        10,000 rows are returned; "truncated" is true when more were available.
     """
+    return await run_sql(_query_sql_server, query)
+
+
+def _get_table_list() -> str:
+    """Blocking body of get_table_list, run off the event loop"""
+    # Columns are aliased to the response keys so each row maps straight
+    # onto a dict without per-field attribute lookups
     query = """
     SELECT 
-        TABLE_SCHEMA,
-        TABLE_NAME,
-        TABLE_TYPE
+        TABLE_SCHEMA AS [schema],
+        TABLE_NAME AS table_name,
+        TABLE_TYPE AS table_type,
+        TABLE_SCHEMA + '.' + TABLE_NAME AS full_name
     FROM INFORMATION_SCHEMA.TABLES 
     WHERE TABLE_TYPE = 'BASE TABLE'
     ORDER BY TABLE_SCHEMA, TABLE_NAME
     """
 
     try:
-        connection_string = get_connection_string()
-        cnxn = pyodbc.connect(connection_string)
-        cursor = cnxn.cursor()
+        with get_conn() as cnxn:
+            cursor = cnxn.cursor()
 
-        cursor.execute(query)
-        results = []
+            cursor.execute(query)
+            keys = [column[0] for column in cursor.description]
+            results = [dict(zip(keys, row)) for row in cursor.fetchall()]
 
-        for row in cursor.fetchall():
-            results.append({
-                "schema": row.TABLE_SCHEMA,
-                "table_name": row.TABLE_NAME,
-                "table_type": row.TABLE_TYPE,
-                "full_name": f"{row.TABLE_SCHEMA}.{row.TABLE_NAME}"
-            })
-
-        cursor.close()
-        cnxn.close()
+            cursor.close()
 
         result = {
             "status": "success",
             "table_count": len(results),
             "tables": results
         }
-        return json.dumps(result, indent=2)
+        return _json(result)
 
     except Exception as e:
         result = {
             "status": "error",
             "error": str(e)
         }
-        return json.dumps(result, indent=2)
+        return _json(result)
 
 
 @mcp.tool()
-def get_table_schema(table_name: str, schema_name: str = "dbo") -> str:
+async def get_table_list() -> str:
     """
-    Get the schema information for a specific table
-
-    Args:
-        table_name: Name of the table
-        schema_name: Schema name (default: dbo)
+    Get a list of all tables in the current database
     """
+    return await run_sql(_get_table_list)
+
+
+# Column metadata rarely changes, so get_table_schema answers repeat
+# lookups from memory and only re-queries once an entry is this old
+SCHEMA_CACHE_TTL = 300  # seconds
+_schema_cache = {}
+
+
+def _fetch_table_columns(table_name: str, schema_name: str) -> tuple:
+    """Return the column descriptions for a table, served from cache while fresh"""
+    cache_key = (CURRENT_SQL_CONFIG, schema_name, table_name)
+    cached = _schema_cache.get(cache_key)
+    if cached and time.monotonic() - cached[0] < SCHEMA_CACHE_TTL:
+        return cached[1]
+
+    # Columns are aliased to the response keys (see get_table_list)
     query = """
     SELECT 
-        COLUMN_NAME,
-        DATA_TYPE,
-        IS_NULLABLE,
-        CHARACTER_MAXIMUM_LENGTH,
-        NUMERIC_PRECISION,
-        NUMERIC_SCALE,
-        COLUMN_DEFAULT,
-        ORDINAL_POSITION
+        COLUMN_NAME AS column_name,
+        DATA_TYPE AS data_type,
+        IS_NULLABLE AS is_nullable,
+        CHARACTER_MAXIMUM_LENGTH AS max_length,
+        NUMERIC_PRECISION AS numeric_precision,
+        NUMERIC_SCALE AS numeric_scale,
+        COLUMN_DEFAULT AS default_value,
+        ORDINAL_POSITION AS position
     FROM INFORMATION_SCHEMA.COLUMNS 
     WHERE TABLE_NAME = ? AND TABLE_SCHEMA = ?
     ORDER BY ORDINAL_POSITION
     """
 
-    try:
-        connection_string = get_connection_string()
-        cnxn = pyodbc.connect(connection_string)
+    with get_conn() as cnxn:
         cursor = cnxn.cursor()
 
+        # Bind both names at the fixed sysname width (NVARCHAR(128)) so the
+        # server reuses one cached plan whatever the name lengths are
+        cursor.setinputsizes([(pyodbc.SQL_WVARCHAR, 128, 0),
+                              (pyodbc.SQL_WVARCHAR, 128, 0)])
         cursor.execute(query, table_name, schema_name)
-        results = []
-
-        for row in cursor.fetchall():
-            results.append({
-                "column_name": row.COLUMN_NAME,
-                "data_type": row.DATA_TYPE,
-                "is_nullable": row.IS_NULLABLE,
-                "max_length": row.CHARACTER_MAXIMUM_LENGTH,
-                "numeric_precision": row.NUMERIC_PRECISION,
-                "numeric_scale": row.NUMERIC_SCALE,
-                "default_value": row.COLUMN_DEFAULT,
-                "position": row.ORDINAL_POSITION
-            })
+        keys = [column[0] for column in cursor.description]
+        columns = tuple(dict(zip(keys, row)) for row in cursor.fetchall())
 
         cursor.close()
-        cnxn.close()
+
+    if columns:
+        # Don't cache misses - the table may be created in the meantime
+        _schema_cache[cache_key] = (time.monotonic(), columns)
+    return columns
+
+
+def _get_table_schema(table_name: str, schema_name: str = "dbo") -> str:
+    """Blocking body of get_table_schema, run off the event loop"""
+    try:
+        results = _fetch_table_columns(table_name, schema_name)
 
         if not results:
             result = {
                 "status": "error",
                 "error": f"Table '{schema_name}.{table_name}' not found"
             }
-            return json.dumps(result, indent=2)
+            return _json(result)
 
         result = {
             "status": "success",
@@ -338,7 +451,7 @@ def get_table_schema(table_name: str, schema_name: str = "dbo") -> str:
             "column_count": len(results),
             "columns": results
         }
-        return json.dumps(result, indent=2)
+        return _json(result)
 
     except Exception as e:
         result = {
@@ -346,7 +459,43 @@ def get_table_schema(table_name: str, schema_name: str = "dbo") -> str:
             "error": str(e),
             "table_name": f"{schema_name}.{table_name}"
         }
-        return json.dumps(result, indent=2)
+        return _json(result)
+
+
+@mcp.tool()
+async def get_table_schema(table_name: str, schema_name: str = "dbo") -> str:
+    """
+    Get the schema information for a specific table
+
+    Args:
+        table_name: Name of the table
+        schema_name: Schema name (default: dbo)
+    """
+    return await run_sql(_get_table_schema, table_name, schema_name)
+
+
+@functools.lru_cache(maxsize=8)
+def _render_sql_configurations(current_config: str) -> str:
+    """Serialize the configuration list once per active configuration"""
+    configs = []
+    for key, config in SQL_CONFIGURATIONS.items():
+        configs.append({
+            "key": key,
+            "name": config["name"],
+            "server": config["server"],
+            "database": config["database"],
+            "authentication": config["authentication"],
+            "description": config["description"],
+            "is_current": key == current_config
+        })
+
+    result = {
+        "status": "success",
+        "current_config": current_config,
+        "total_configs": len(configs),
+        "configurations": configs
+    }
+    return _json(result)
 
 
 @mcp.tool()
@@ -355,31 +504,13 @@ def list_sql_configurations() -> str:
     List all available SQL Server configurations
     """
     try:
-        configs = []
-        for key, config in SQL_CONFIGURATIONS.items():
-            configs.append({
-                "key": key,
-                "name": config["name"],
-                "server": config["server"],
-                "database": config["database"],
-                "authentication": config["authentication"],
-                "description": config["description"],
-                "is_current": key == CURRENT_SQL_CONFIG
-            })
-
-        result = {
-            "status": "success",
-            "current_config": CURRENT_SQL_CONFIG,
-            "total_configs": len(configs),
-            "configurations": configs
-        }
-        return json.dumps(result, indent=2)
+        return _render_sql_configurations(CURRENT_SQL_CONFIG)
     except (NameError, ImportError):
         result = {
             "status": "error",
             "error": "SQL configuration system not available"
         }
-        return json.dumps(result, indent=2)
+        return _json(result)
 
 
 @mcp.tool()
@@ -399,10 +530,13 @@ def set_sql_configuration(config_name: str) -> str:
                 "status": "error",
                 "error": f"Configuration '{config_name}' not found. Available: {available}"
             }
-            return json.dumps(result, indent=2)
+            return _json(result)
 
         old_config = CURRENT_SQL_CONFIG
         CURRENT_SQL_CONFIG = config_name
+        if config_name != old_config:
+            # Pooled connections belong to the previous server/database
+            reset_connection_pool()
 
         result = {
             "status": "success",
@@ -411,14 +545,14 @@ def set_sql_configuration(config_name: str) -> str:
             "new_config": config_name,
             "config_details": SQL_CONFIGURATIONS[config_name]["description"]
         }
-        return json.dumps(result, indent=2)
+        return _json(result)
 
     except (NameError, ImportError):
         result = {
             "status": "error",
             "error": "SQL configuration system not available"
         }
-        return json.dumps(result, indent=2)
+        return _json(result)
 
 
 @mcp.tool()
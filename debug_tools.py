@@ -30,12 +30,21 @@ async def debug_tools():
                 ("greet", {"name": "Test"})
             ]
             
-            for tool_name, args in tools_to_test:
+            # The calls are independent, so issue them concurrently and
+            # report afterwards in the original order
+            results = await asyncio.gather(
+                *(session.call_tool(tool_name, arguments=args)
+                  for tool_name, args in tools_to_test),
+                return_exceptions=True
+            )
+            
+            for (tool_name, args), result in zip(tools_to_test, results):
                 print(f"\n🛠️  Testing tool: {tool_name}")
                 print("-" * 40)
                 
                 try:
-                    result = await session.call_tool(tool_name, arguments=args)
+                    if isinstance(result, BaseException):
+                        raise result
                     
                     print(f"Response type: {type(result)}")
                     print(f"Content length: {len(result.content)}")
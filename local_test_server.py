@@ -8,10 +8,30 @@ import asyncio
 import json
 import sys
 import os
-from http.server import HTTPServer, BaseHTTPRequestHandler
+import socket
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from urllib.parse import urlparse, parse_qs
 import logging
 
+# Prefer orjson when installed: it serializes straight to bytes and parses
+# bytes without a separate UTF-8 decode pass. Output is compact unless a
+# client asks for pretty-printing.
+try:
+    import orjson
+
+    def _dumps(data, pretty=False):
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if pretty else None)
+
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(data, pretty=False):
+        if pretty:
+            return json.dumps(data, indent=2).encode('utf-8')
+        return json.dumps(data, separators=(',', ':')).encode('utf-8')
+
+    _loads = json.loads
+
 # Add shared_code to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'shared_code'))
 
@@ -26,86 +46,142 @@ except ImportError as e:
     logger = logging.getLogger(__name__)
 
 
+def extract_tool_result(result):
+    """
+    Pull the tool's return value out of a FastMCP call_tool result.
+
+    FastMCP returns ([TextContent, ...], {"result": value}); the structured
+    value is preferred and content lists collapse to their first text.
+    The common shape is handled without probing; anything else falls back
+    to its string form.
+    """
+    try:
+        actual_result = result[1].get('result', result[0])
+    except (TypeError, IndexError, KeyError, AttributeError):
+        return str(result)
+
+    if isinstance(actual_result, list) and actual_result:
+        try:
+            # Handle TextContent objects
+            return actual_result[0].text
+        except AttributeError:
+            return str(actual_result)
+    return actual_result
+
+
+def _error_body(status_code, message):
+    """Encode the standard error response body"""
+    return _dumps({
+        "status": "error",
+        "message": message,
+        "error_code": status_code
+    })
+
+
+# Fixed-message error responses, encoded once instead of per request
+MCP_UNAVAILABLE_BODY = _error_body(500, "MCP server not available")
+MISSING_TOOL_BODY = _error_body(400, "Missing 'tool' parameter in request")
+
+
 class MCPHTTPHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 keeps client connections open between requests; every
+    # response must therefore carry a Content-Length
+    protocol_version = "HTTP/1.1"
+
+    # Buffer the response so headers and body go out in a single send;
+    # handle_one_request() flushes wfile after every request
+    wbufsize = 64 * 1024
+
+    def setup(self):
+        """Tune the client socket for small request/response exchanges"""
+        super().setup()
+        # Don't let Nagle's algorithm hold back the tail of a response
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 64 * 1024)
+
+    # Background event loop shared by all requests; set by run_server()
+    loop = None
+
+    def run_async(self, coro):
+        """Run an MCP coroutine on the shared event loop and wait for its result"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    # Tool descriptors and the encoded GET / responses (keyed by the pretty
+    # flag). The tool set is fixed once the server is running, so
+    # preload_tools() fetches it once at startup and GETs never touch MCP.
+    _tools_meta = None
+    _tools_bodies = {}
+    _tools_lock = threading.Lock()
+
+    @classmethod
+    def preload_tools(cls):
+        """Fetch the tool descriptors once and pre-encode the GET / responses"""
+        tools_list = asyncio.run_coroutine_threadsafe(
+            mcp.list_tools(), cls.loop).result()
+        cls._tools_meta = [{"name": tool_info.name, "description": tool_info.description}
+                           for tool_info in tools_list]
+
+        response_data = {
+            "status": "success",
+            "message": "MCP Server is running (Local Test Mode)",
+            "server_name": mcp.name,
+            "available_tools": cls._tools_meta,
+            "tool_count": len(cls._tools_meta),
+            "endpoints": {
+                "get_tools": "GET /",
+                "execute_tool": "POST /",
+                "bmi_example": "POST / with {'tool': 'calculate_bmi', 'arguments': {'weight_kg': 70, 'height_m': 1.75}}"
+            }
+        }
+        cls._tools_bodies = {pretty: _dumps(response_data, pretty)
+                             for pretty in (False, True)}
+
+    def get_tools_body(self, pretty=False):
+        """Return the encoded server info/tools response"""
+        if not self._tools_bodies:
+            # Startup preload failed or was skipped; retry once, serialized
+            with MCPHTTPHandler._tools_lock:
+                if not MCPHTTPHandler._tools_bodies:
+                    MCPHTTPHandler.preload_tools()
+        return self._tools_bodies[pretty]
+
     def do_GET(self):
         """Handle GET requests - return server info and available tools"""
         try:
             if not MCP_AVAILABLE:
-                self.send_error_response(500, "MCP server not available")
+                self.send_encoded_response(500, MCP_UNAVAILABLE_BODY)
                 return
 
-            # Use asyncio to handle async MCP calls
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-
-            tools_list = loop.run_until_complete(mcp.list_tools())
-            tools = []
-            for tool_info in tools_list:
-                tools.append({
-                    "name": tool_info.name,
-                    "description": tool_info.description
-                })
-
-            response_data = {
-                "status": "success",
-                "message": "MCP Server is running (Local Test Mode)",
-                "server_name": mcp.name,
-                "available_tools": tools,
-                "tool_count": len(tools),
-                "endpoints": {
-                    "get_tools": "GET /",
-                    "execute_tool": "POST /",
-                    "bmi_example": "POST / with {'tool': 'calculate_bmi', 'arguments': {'weight_kg': 70, 'height_m': 1.75}}"
-                }
-            }
-
-            self.send_json_response(200, response_data)
+            # Compact JSON by default; ?pretty=1 indents it for humans
+            pretty = bool(parse_qs(urlparse(self.path).query).get('pretty'))
+            self.send_encoded_response(200, self.get_tools_body(pretty))
 
         except Exception as e:
-            logger.error(f"Error in GET handler: {e}")
+            logger.error("Error in GET handler: %s", e)
             self.send_error_response(500, f"Error getting tools: {str(e)}")
 
     def do_POST(self):
         """Handle POST requests - execute tools"""
         try:
+            # Always consume the body so a kept-alive connection stays in sync
+            post_data = self.read_body()
+
             if not MCP_AVAILABLE:
-                self.send_error_response(500, "MCP server not available")
+                self.send_encoded_response(500, MCP_UNAVAILABLE_BODY)
                 return
 
-            content_length = int(self.headers['Content-Length'])
-            post_data = self.rfile.read(content_length)
-            request_data = json.loads(post_data.decode('utf-8'))
+            request_data = _loads(post_data)
 
             tool_name = request_data.get('tool')
             arguments = request_data.get('arguments', {})
 
             if not tool_name:
-                self.send_error_response(
-                    400, "Missing 'tool' parameter in request")
+                self.send_encoded_response(400, MISSING_TOOL_BODY)
                 return
 
-            # Use asyncio to handle async MCP calls
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-
-            result = loop.run_until_complete(
-                mcp.call_tool(tool_name, arguments))
-
-            # Process result based on MCP response format
-            if isinstance(result, tuple) and len(result) >= 2:
-                # Extract the actual result from MCP response
-                actual_result = result[1].get('result', result[0])
-                if isinstance(actual_result, list) and actual_result:
-                    # Handle TextContent objects
-                    text_content = actual_result[0]
-                    if hasattr(text_content, 'text'):
-                        tool_result = text_content.text
-                    else:
-                        tool_result = str(actual_result)
-                else:
-                    tool_result = actual_result
-            else:
-                tool_result = str(result)
+            result = self.run_async(mcp.call_tool(tool_name, arguments))
+
+            tool_result = extract_tool_result(result)
 
             response_data = {
                 "status": "success",
@@ -120,33 +196,49 @@ class MCPHTTPHandler(BaseHTTPRequestHandler):
         except json.JSONDecodeError as e:
             self.send_error_response(400, f"Invalid JSON: {str(e)}")
         except Exception as e:
-            logger.error(f"Tool execution failed: {e}")
+            logger.error("Tool execution failed: %s", e)
             self.send_error_response(500, f"Tool execution failed: {str(e)}")
 
+    def read_body(self):
+        """Read the request body into one preallocated buffer"""
+        content_length = int(self.headers['Content-Length'])
+        body = bytearray(content_length)
+        view = memoryview(body)
+        received = 0
+        while received < content_length:
+            count = self.rfile.readinto(view[received:])
+            if not count:
+                break
+            received += count
+        # Both orjson and json accept bytearray, so no copy to bytes is needed
+        return body if received == content_length else body[:received]
+
     def do_OPTIONS(self):
         """Handle CORS preflight requests"""
         self.send_response(200)
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Content-Length', '0')
         self.end_headers()
 
     def send_json_response(self, status_code, data):
         """Send a JSON response"""
+        self.send_encoded_response(status_code, _dumps(data))
+
+    def send_encoded_response(self, status_code, body):
+        """Send an already encoded JSON body"""
         self.send_response(status_code)
         self.send_header('Content-type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
         self.send_header('Access-Control-Allow-Origin', '*')
         self.end_headers()
-        self.wfile.write(json.dumps(data, indent=2).encode('utf-8'))
+        self.wfile.write(body)
 
     def send_error_response(self, status_code, message):
         """Send an error response"""
-        error_response = {
-            "status": "error",
-            "message": message,
-            "error_code": status_code
-        }
-        self.send_json_response(status_code, error_response)
+        self.send_encoded_response(
+            status_code, _error_body(status_code, message))
 
     def log_message(self, format, *args):
         """Custom log message format"""
@@ -157,7 +249,19 @@ def run_server():
     """Run the HTTP server"""
     port = 7071
     server_address = ('', port)
-    httpd = HTTPServer(server_address, MCPHTTPHandler)
+    httpd = ThreadingHTTPServer(server_address, MCPHTTPHandler)
+
+    # One long-lived event loop for MCP calls instead of a new loop per request
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever,
+                     name="mcp-event-loop", daemon=True).start()
+    MCPHTTPHandler.loop = loop
+
+    if MCP_AVAILABLE:
+        try:
+            MCPHTTPHandler.preload_tools()
+        except Exception as e:
+            print(f"Warning: could not preload MCP tools: {e}")
 
     print("🚀 MCP BMI Calculator Server")
     print("=" * 50)
@@ -203,6 +307,7 @@ def run_server():
     except KeyboardInterrupt:
         print("\n\n🛑 Shutting down server...")
         httpd.server_close()
+        loop.call_soon_threadsafe(loop.stop)
         print("✅ Server stopped")
 
 
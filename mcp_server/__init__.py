@@ -1,236 +1,596 @@
+import asyncio
 import azure.functions as func
+import functools
 import json
 import logging
 import sys
 import os
 from typing import Dict, Any
+from urllib.parse import urlsplit
 
-# Add the shared_code directory to the path
-shared_code_path = os.path.join(os.path.dirname(__file__), '..', 'shared_code')
+# Prefer orjson when installed: it encodes straight to bytes, which
+# HttpResponse accepts as the body without a separate UTF-8 encode.
+try:
+    import orjson
+
+    def _dumps(data, pretty=False):
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if pretty else None)
+
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(data, pretty=False):
+        return json.dumps(data, indent=2 if pretty else None).encode('utf-8')
+
+    _loads = json.loads
+
+# Add the shared_code directory to the path. A single absolute entry keeps
+# the finder scan short for every later import.
+shared_code_path = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..', 'shared_code'))
 if shared_code_path not in sys.path:
     sys.path.insert(0, shared_code_path)
 
-# Also try the absolute path approach
-abs_shared_code_path = os.path.abspath(shared_code_path)
-if abs_shared_code_path not in sys.path:
-    sys.path.insert(0, abs_shared_code_path)
+# The shared MCP server (FastMCP, SQL helpers, ...) is imported on the first
+# request rather than at module load, so the Functions host finishes loading
+# this function sooner. _ensure_mcp() fills these in.
+shared_mcp = None
+mcp = None
+logger = logging.getLogger(__name__)
+_mcp_import_attempted = False
+# mcp.name, resolved once by _ensure_mcp() (None when unavailable)
+mcp_name = None
+
+# Runtime details are fixed for the worker, so log them once at load
+if logger.isEnabledFor(logging.DEBUG):
+    logger.debug(f"Python version: {sys.version}")
+
+
+def _import_shared_mcp():
+    """
+    Import the shared MCP module once and return it (None if the import failed).
+
+    This does not build the FastMCP server; that happens on first access to
+    shared_mcp.mcp in _ensure_mcp().
+    """
+    global shared_mcp, logger, _mcp_import_attempted
+    if _mcp_import_attempted:
+        return shared_mcp
+    _mcp_import_attempted = True
 
-# Import from shared_code
-try:
-    import mcp_server as shared_mcp
-    mcp = shared_mcp.mcp
-    logger = shared_mcp.logger
-    logger.info("Successfully imported MCP server from shared_code")
-except ImportError as e:
-    logging.error(f"Failed to import shared MCP server: {e}")
-    logging.error(f"Current sys.path: {sys.path}")
-    logging.error(f"Current working directory: {os.getcwd()}")
-    logging.error(f"Contents of current directory: {os.listdir('.')}")
-
-    # Check if shared_code directory exists
-    logging.error(f"Shared code path: {shared_code_path}")
-    logging.error(
-        f"Shared code path exists: {os.path.exists(shared_code_path)}")
-    if os.path.exists(shared_code_path):
-        logging.error(
-            f"Contents of shared_code: {os.listdir(shared_code_path)}")
-
-    # Try alternative import approach
     try:
-        sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
-        from shared_code import mcp_server as shared_mcp
-        mcp = shared_mcp.mcp
+        import mcp_server as shared_mcp
         logger = shared_mcp.logger
-        logging.info(
-            "Successfully imported MCP server using alternative method")
-    except ImportError as e2:
-        logging.error(f"Alternative import also failed: {e2}")
+        logger.info("Successfully imported MCP server from shared_code")
+    except ImportError as e:
+        logging.error(f"Failed to import shared MCP server: {e}")
+
+        # Directory listings are only useful when diagnosing a broken deployment
+        if os.environ.get("MCP_DEBUG_IMPORT"):
+            shared_code_exists = os.path.exists(shared_code_path)
+            logging.error(
+                f"Current sys.path: {sys.path}\n"
+                f"Current working directory: {os.getcwd()}\n"
+                f"Contents of current directory: {os.listdir('.')}\n"
+                f"Shared code path: {shared_code_path}\n"
+                f"Shared code path exists: {shared_code_exists}\n"
+                f"Contents of shared_code: "
+                f"{os.listdir(shared_code_path) if shared_code_exists else None}")
+
         # Fallback logging
-        logger = logging.getLogger(__name__)
-        mcp = None
+        shared_mcp = None
 
+    return shared_mcp
 
-async def main(req: func.HttpRequest) -> func.HttpResponse:
-    """
-    Azure Function HTTP trigger for MCP Server
 
-    This function handles HTTP requests and routes them to the appropriate MCP tools.
-    """
+def _ensure_mcp():
+    """Import the shared MCP server once and return (mcp, logger, shared_mcp)"""
+    global mcp, mcp_name
+    if mcp is None and _import_shared_mcp() is not None:
+        mcp = shared_mcp.mcp
+        mcp_name = getattr(mcp, 'name', None)
+    return mcp, logger, shared_mcp
+
+
+# Simple input schemas for known tools (used to populate MCP Tool metadata)
+TOOL_INPUT_SCHEMAS = {
+    "calculate_bmi": {
+        "type": "object",
+        "properties": {
+            "weight_kg": {"type": "number", "description": "Weight in kilograms"},
+            "height_m": {"type": "number", "description": "Height in meters"}
+        },
+        "required": ["weight_kg", "height_m"]
+    },
+    "get_bmi_resources": {
+        "type": "object",
+        "properties": {
+            "resource_type": {"type": "string", "description": "Resource type to fetch (e.g., all, categories)"}
+        }
+    },
+    "test_network_connectivity": {"type": "object", "properties": {}},
+    "test_sql_connection": {"type": "object", "properties": {}},
+    "query_sql_server": {
+        "type": "object",
+        "properties": {"query": {"type": "string", "description": "SELECT query to run"}},
+        "required": ["query"]
+    },
+    "get_sql_config_debug": {"type": "object", "properties": {}},
+    "get_server_info": {"type": "object", "properties": {}},
+    "greet": {
+        "type": "object",
+        "properties": {"name": {"type": "string", "description": "Name to greet"}},
+        "required": ["name"]
+    }
+}
+
+
+# Helper to await coroutines or return sync results. FastMCP hands back
+# coroutines; checking for those (and futures) directly avoids the
+# Awaitable ABC walk inside inspect.isawaitable.
+async def _maybe_await(value):
+    if asyncio.iscoroutine(value) or isinstance(value, asyncio.Future):
+        return await value
+    return value
+
+
+# Normalized tool list from the MCP runtime. FastMCP's registry is fixed once
+# the worker has started, so it is listed once; the fallback metadata is not
+# cached so a later request can still pick up the runtime.
+_TOOLS_CACHE = None
+
+
+async def _get_tools():
+    """Return normalized list of tools as dicts with keys: name, title, description, inputSchema"""
+    global _TOOLS_CACHE
+    if _TOOLS_CACHE is not None:
+        return _TOOLS_CACHE
+
     try:
-        logger.info('MCP Server HTTP trigger function processed a request.')
+        raw_tools = await _maybe_await(mcp.list_tools())
+    except Exception:
+        raw_tools = None
+
+    tools = []
+    if raw_tools:
+        # raw_tools likely a list of tool objects from FastMCP
+        for tool in raw_tools:
+            name = getattr(tool, 'name', None) or getattr(
+                tool, 'id', None)
+            description = getattr(tool, 'description', None)
+            title = getattr(tool, 'title', name)
+            input_schema = TOOL_INPUT_SCHEMAS.get(
+                name, {"type": "object"})
+            tools.append(
+                {"name": name, "title": title, "description": description, "inputSchema": input_schema})
+        _TOOLS_CACHE = tools
+    else:
+        # Fallback: build tools from TOOL_INPUT_SCHEMAS and shared_mcp functions
+        import inspect
+
+        for name, schema in TOOL_INPUT_SCHEMAS.items():
+            title = name
+            description = None
+            try:
+                func_obj = getattr(shared_mcp, name, None)
+                if func_obj:
+                    doc = inspect.getdoc(func_obj) or ""
+                    # Title: first line of docstring if present
+                    title = doc.splitlines()[0] if doc else name
+                    # Description: full docstring
+                    description = doc
+            except Exception:
+                description = None
+            tools.append(
+                {"name": name, "title": title, "description": description, "inputSchema": schema})
+
+    return tools
+
+
+# Encoded SSE and GET bodies for the most recently seen tool list. The tool
+# set is effectively static, so warm requests skip JSON encoding. The cached
+# list from _get_tools() is the same object every time, so an identity check
+# is enough on the hot path; other lists are compared by their tools'
+# (name, title) signature so a changed tool set is re-encoded.
+_SSE_CACHE = {"tools": None, "key": None, "body": None}
+_GET_CACHE = {"tools": None, "key": None, "body": None}
+
+
+def _tools_key(tools):
+    return tuple((tool["name"], tool["title"]) for tool in tools)
+
+
+def _cached_body(cache, tools, build):
+    """Return the body cached for `tools`, encoding it with build() on a change"""
+    if cache["tools"] is not tools:
+        key = _tools_key(tools)
+        if cache["key"] != key:
+            cache["body"] = build(tools)
+            cache["key"] = key
+        cache["tools"] = tools
+    return cache["body"]
+
+
+def _build_sse_body(tools):
+    # Build a JSON-RPC envelope similar to GitHub MCP server so Postman's
+    # MCP client recognizes capabilities.
+    rpc_payload = {
+        "jsonrpc": "2.0",
+        "id": 0,
+        "result": {
+            "capabilities": {
+                "tools": tools,
+                "nextCursor": None
+            }
+        }
+    }
+
+    # Final marker event to signal completion (also JSON-RPC style)
+    final_rpc = {"jsonrpc": "2.0", "id": 0, "result": {"done": True}}
+
+    # Primary event uses 'event: message' then 'data: <json>'; both events
+    # are written into one buffer so no intermediate bodies are built
+    body = bytearray(b'event: message\ndata: ')
+    body += _dumps(rpc_payload)
+    body += b'\n\nevent: message\ndata: '
+    body += _dumps(final_rpc)
+    body += b'\n\n'
+    return bytes(body)
+
+
+# Return as text/event-stream without Content-Length to allow
+# chunked transfer encoding (GitHub uses chunked); Postman handles this.
+_SSE_HEADERS = {
+    'Cache-Control': 'no-cache',
+    # Signal the client that the server will close the connection
+    # after the SSE events. Some clients (Postman MCP) rely on
+    # Connection: close to detect the end of the stream.
+    'Connection': 'close'
+}
+
+
+def _make_sse_response(tools):
+    body = _cached_body(_SSE_CACHE, tools, _build_sse_body)
+    return func.HttpResponse(body=body, mimetype="text/event-stream", status_code=200, headers=_SSE_HEADERS)
+
+
+def _build_get_body(tools):
+    response_data = {
+        "status": "success",
+        "message": "MCP Server is running on Azure Functions",
+        "server_name": mcp_name or 'BMI and SQL Server - Azure Functions',
+        "available_tools": tools,
+        "tool_count": len(tools)
+    }
+    return _dumps(response_data, pretty=True)
+
+
+def _get_tools_body(tools):
+    """Return the encoded GET server info/tools response for `tools`"""
+    return _cached_body(_GET_CACHE, tools, _build_get_body)
+
+
+def _content_text(content):
+    """Text of the first item of a content list, else its string form"""
+    if isinstance(content, list) and content:
+        first = content[0]
+        try:
+            return first.text
+        except AttributeError:
+            return str(first)
+    return str(content)
 
-        # Log function startup details for debugging
-        logger.info(f"Python version: {sys.version}")
-        logger.info(f"Function runtime environment initialized")
 
-    except Exception as startup_error:
+def _tuple_result(result, structured):
+    # FastMCP returns a tuple: ([TextContent], metadata); prefer the
+    # metadata 'result' value when the caller accepts structured output
+    if not result:
+        return str(result)
+    if structured and len(result) >= 2:
+        metadata = result[1]
+        if isinstance(metadata, dict) and 'result' in metadata:
+            return metadata['result']
+    return _content_text(result[0])
+
+
+def _content_result(result, structured):
+    # CallToolResult-style objects carry a content list
+    content = result.content
+    return _content_text(content) if content else str(result)
+
+
+def _probe_result_type(result):
+    """Pick the extractor for a call_tool result's type from one instance"""
+    if isinstance(result, tuple):
+        return _tuple_result
+    if isinstance(result, str):
+        return lambda result, structured: result
+    if hasattr(result, 'content'):
+        return _content_result
+    if hasattr(result, 'text'):
+        return lambda result, structured: result.text
+    return lambda result, structured: str(result)
+
+
+# call_tool result type -> extractor. Results of a given type always have
+# the same shape, so the isinstance/hasattr probing runs once per type.
+_RESULT_EXTRACTORS = {}
+
+
+def _extract_result_text(result, structured=True):
+    """Return the tool output carried by a call_tool result"""
+    result_type = type(result)
+    extractor = _RESULT_EXTRACTORS.get(result_type)
+    if extractor is None:
+        extractor = _RESULT_EXTRACTORS.setdefault(
+            result_type, _probe_result_type(result))
+    return extractor(result, structured)
+
+
+# Encoded health response. Everything in it is fixed for the life of the
+# worker once the shared MCP import has been attempted, so it is built on the
+# first health probe and reused by every later one.
+_HEALTH_BODY = None
+
+
+# Result strings above this size are parsed without being memoized
+_PARSE_CACHE_MAX_LEN = 64 * 1024
+
+
+@functools.lru_cache(maxsize=128)
+def _parse_json_cached(text):
+    try:
+        return _loads(text)
+    except json.JSONDecodeError:
+        return text
+
+
+def _parse_json_or_passthrough(value):
+    """Parse a tool result as JSON, returning it unchanged if it isn't JSON"""
+    # Info/debug tools return the same JSON text on every call, so small
+    # strings are parsed once; the parsed value is only ever serialized
+    if isinstance(value, str) and len(value) <= _PARSE_CACHE_MAX_LEN:
+        return _parse_json_cached(value)
+    try:
+        return _loads(value)
+    except (json.JSONDecodeError, TypeError):
+        return value
+
+
+def _health_body():
+    global _HEALTH_BODY
+    if _HEALTH_BODY is None:
+        _HEALTH_BODY = _dumps({
+            "status": "healthy",
+            "message": "Azure Function is running",
+            "mcp_available": shared_mcp is not None,
+            "python_version": sys.version,
+            "working_directory": os.getcwd(),
+            "sys_path": sys.path[:3]  # First few paths for debugging
+        })
+    return _HEALTH_BODY
+
+
+def _is_health_path(url):
+    """True when the request path (ignoring query string) ends in /health"""
+    return urlsplit(url).path.rstrip('/').endswith('/health')
+
+
+async def _handle_get(req, request_data):
+    """Return server information and available tools"""
+    try:
+        # Get available tools (FastMCP or fallback)
+        tools = await _get_tools()
+
+        return func.HttpResponse(
+            _get_tools_body(tools),
+            mimetype="application/json",
+            status_code=200
+        )
+    except Exception as e:
         logger.error(
-            f"Error during function startup: {str(startup_error)}", exc_info=True)
+            f"Error getting tools list: {str(e)}", exc_info=True)
+        # dir() builds a full attribute listing; only pay for it when debugging
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"MCP object type: {type(mcp)}, attributes: {dir(mcp)}")
+        response_data = {
+            "status": "success",
+            "message": "MCP Server is running on Azure Functions",
+            "server_name": mcp_name or 'Unknown',
+            "available_tools": [],
+            "tool_count": 0,
+            "error": f"Could not load tools: {str(e)}"
+        }
+
         return func.HttpResponse(
-            json.dumps({
-                "status": "error",
-                "message": f"Function startup failed: {str(startup_error)}"
-            }),
+            _dumps(response_data, pretty=True),
             mimetype="application/json",
-            status_code=500
+            status_code=200
         )
 
+
+async def _handle_list_tools(req, request_data):
+    """Handle {"action": "list_tools"} and JSON-RPC tools/list requests"""
     try:
-        # Helper to await coroutines or return sync results
-        async def _maybe_await(value):
-            import inspect
-            if inspect.isawaitable(value):
-                return await value
-            return value
-
-        # Simple input schemas for known tools (used to populate MCP Tool metadata)
-        TOOL_INPUT_SCHEMAS = {
-            "calculate_bmi": {
-                "type": "object",
-                "properties": {
-                    "weight_kg": {"type": "number", "description": "Weight in kilograms"},
-                    "height_m": {"type": "number", "description": "Height in meters"}
-                },
-                "required": ["weight_kg", "height_m"]
-            },
-            "get_bmi_resources": {
-                "type": "object",
-                "properties": {
-                    "resource_type": {"type": "string", "description": "Resource type to fetch (e.g., all, categories)"}
+        tools = await _get_tools()
+
+        # If JSON-RPC request, wrap in jsonrpc response
+        if request_data.get('method') == 'tools/list':
+            rpc_response = {
+                "jsonrpc": "2.0",
+                "id": request_data.get('id'),
+                "result": {
+                    "tools": tools,
+                    "nextCursor": None
                 }
-            },
-            "test_network_connectivity": {"type": "object", "properties": {}},
-            "test_sql_connection": {"type": "object", "properties": {}},
-            "query_sql_server": {
-                "type": "object",
-                "properties": {"query": {"type": "string", "description": "SELECT query to run"}},
-                "required": ["query"]
-            },
-            "get_sql_config_debug": {"type": "object", "properties": {}},
-            "get_server_info": {"type": "object", "properties": {}},
-            "greet": {
-                "type": "object",
-                "properties": {"name": {"type": "string", "description": "Name to greet"}},
-                "required": ["name"]
             }
+            return func.HttpResponse(_dumps(rpc_response, pretty=True), mimetype="application/json", status_code=200)
+
+        return func.HttpResponse(_get_tools_body(tools), mimetype="application/json", status_code=200)
+    except Exception as e:
+        logger.error(
+            f"Error getting tools list (POST action): {str(e)}", exc_info=True)
+        return func.HttpResponse(_dumps({"status": "error", "message": f"Could not load tools: {str(e)}"}), mimetype="application/json", status_code=500)
+
+
+async def _handle_rpc_call(req, request_data):
+    """Handle JSON-RPC tool calls: {"jsonrpc":"2.0","method":"tools/call","params":{...}}"""
+    request_id = request_data.get('id')
+    params = request_data.get('params') or {}
+    name = params.get('name')
+    arguments = params.get('arguments', {})
+    if not name:
+        return func.HttpResponse(_dumps({"jsonrpc": "2.0", "id": request_id, "error": {"code": -32602, "message": "Missing 'name' in params"}}), mimetype="application/json", status_code=400)
+    try:
+        result = await _maybe_await(mcp.call_tool(name, arguments))
+        # Normalize into MCP result shape: {content: [...], isError: false}
+        content_items = []
+        try:
+            # MCP content is text, so skip the structured value
+            result_text = _extract_result_text(
+                result, structured=False)
+            content_items.append(
+                {"type": "text", "text": result_text})
+        except Exception:
+            content_items.append(
+                {"type": "text", "text": str(result)})
+
+        rpc_response = {"jsonrpc": "2.0", "id": request_id,
+                        "result": {"content": content_items, "isError": False}}
+        return func.HttpResponse(_dumps(rpc_response, pretty=True), mimetype="application/json", status_code=200)
+    except Exception as e:
+        rpc_error = {"jsonrpc": "2.0", "id": request_id,
+                     "error": {"code": -32000, "message": str(e)}}
+        return func.HttpResponse(_dumps(rpc_error, pretty=True), mimetype="application/json", status_code=500)
+
+
+async def _handle_tool_call(req, request_data):
+    """Handle the simple {"tool": ..., "arguments": {...}} request form"""
+    tool_name = request_data.get('tool')
+    arguments = request_data.get('arguments', {})
+
+    if not tool_name:
+        return func.HttpResponse(
+            _dumps(
+                {"error": "Missing 'tool' parameter in request"}),
+            mimetype="application/json",
+            status_code=400
+        )
+
+    # Check if tool exists and execute it
+    try:
+        # Use MCP's call_tool method
+        logger.info(
+            f"Executing tool: {tool_name} with arguments: {arguments}")
+        result = await _maybe_await(mcp.call_tool(tool_name, arguments))
+
+        result_text = _extract_result_text(result)
+
+        # Try to parse as JSON if it looks like JSON
+        parsed_result = _parse_json_or_passthrough(result_text)
+
+        response_data = {
+            "status": "success",
+            "tool": tool_name,
+            "result": parsed_result,
+            "arguments": arguments
         }
 
-        # Check if MCP is available. Do not abort here — we have a
-        # fallback metadata generator in `_get_tools()` that can
-        # populate capabilities for clients (useful for local testing
-        # when the MCP runtime isn't importable).
-        if mcp is None:
-            try:
-                logger.warning(
-                    "MCP runtime not available; using fallback tool metadata")
-            except Exception:
-                # If logger isn't set for some reason, fallback to python logging
-                logging.warning(
-                    "MCP runtime not available; using fallback tool metadata")
+        return func.HttpResponse(
+            _dumps(response_data, pretty=True),
+            mimetype="application/json",
+            status_code=200
+        )
+
+    except Exception as e:
+        # Handle various types of tool execution errors
+        error_msg = str(e)
+        if "not found" in error_msg.lower():
+            # Tool not found error
+            available_tools = [tool["name"] for tool in await _get_tools()]
+            return func.HttpResponse(
+                _dumps({
+                    "error": f"Tool '{tool_name}' not found",
+                    "available_tools": available_tools
+                }),
+                mimetype="application/json",
+                status_code=404
+            )
+        elif "argument" in error_msg.lower():
+            # Invalid arguments error
+            return func.HttpResponse(
+                _dumps({
+                    "error": f"Invalid arguments for tool '{tool_name}': {error_msg}",
+                    "tool": tool_name,
+                    "provided_arguments": arguments
+                }),
+                mimetype="application/json",
+                status_code=400
+            )
+        else:
+            # General execution error
+            logger.error(
+                f"Error executing tool '{tool_name}': {error_msg}")
+            return func.HttpResponse(
+                _dumps({
+                    "error": f"Tool execution failed: {error_msg}",
+                    "tool": tool_name,
+                    "arguments": arguments
+                }),
+                mimetype="application/json",
+                status_code=500
+            )
+
+
+# (HTTP method, JSON-RPC method) -> handler. Requests without a specific
+# route fall back to the (method, None) entry.
+HANDLERS = {
+    ('GET', None): _handle_get,
+    ('POST', 'tools/list'): _handle_list_tools,
+    ('POST', 'tools/call'): _handle_rpc_call,
+    ('POST', None): _handle_tool_call,
+}
 
+
+async def main(req: func.HttpRequest) -> func.HttpResponse:
+    """
+    Azure Function HTTP trigger for MCP Server
+
+    This function handles HTTP requests and routes them to the appropriate MCP tools.
+    """
+    try:
         # Get request method and body
         method = req.method.upper()
 
-        # Add a health check endpoint that doesn't depend on MCP
-        if method == 'GET' and req.url.endswith('/health'):
+        # Add a health check endpoint that doesn't depend on MCP. It only
+        # imports the shared module, so probes never build the FastMCP server.
+        if method == 'GET' and _is_health_path(req.url):
+            _import_shared_mcp()
+            logger.info('MCP Server HTTP trigger function processed a request.')
             return func.HttpResponse(
-                json.dumps({
-                    "status": "healthy",
-                    "message": "Azure Function is running",
-                    "mcp_available": mcp is not None,
-                    "python_version": sys.version,
-                    "working_directory": os.getcwd(),
-                    "sys_path": sys.path[:3]  # First few paths for debugging
-                }),
+                _health_body(),
                 mimetype="application/json",
                 status_code=200
             )
 
-        import inspect
-
-        async def _get_tools():
-            """Return normalized list of tools as dicts with keys: name, title, description, inputSchema"""
-            try:
-                raw_tools = await _maybe_await(mcp.list_tools())
-            except Exception:
-                raw_tools = None
-
-            tools = []
-            if raw_tools:
-                # raw_tools likely a list of tool objects from FastMCP
-                for tool in raw_tools:
-                    name = getattr(tool, 'name', None) or getattr(
-                        tool, 'id', None)
-                    description = getattr(tool, 'description', None)
-                    title = getattr(tool, 'title', name)
-                    input_schema = TOOL_INPUT_SCHEMAS.get(
-                        name, {"type": "object"})
-                    tools.append(
-                        {"name": name, "title": title, "description": description, "inputSchema": input_schema})
-            else:
-                # Fallback: build tools from TOOL_INPUT_SCHEMAS and shared_mcp functions
-                for name, schema in TOOL_INPUT_SCHEMAS.items():
-                    title = name
-                    description = None
-                    try:
-                        func_obj = getattr(shared_mcp, name, None)
-                        if func_obj:
-                            doc = inspect.getdoc(func_obj) or ""
-                            # Title: first line of docstring if present
-                            title = doc.splitlines()[0] if doc else name
-                            # Description: full docstring
-                            description = doc
-                    except Exception:
-                        description = None
-                    tools.append(
-                        {"name": name, "title": title, "description": description, "inputSchema": schema})
-
-            return tools
-
-        def _make_sse_response(tools):
-            # Build a JSON-RPC envelope similar to GitHub MCP server so Postman's
-            # MCP client recognizes capabilities.
-            rpc_payload = {
-                "jsonrpc": "2.0",
-                "id": 0,
-                "result": {
-                    "capabilities": {
-                        "tools": tools,
-                        "nextCursor": None
-                    }
-                }
-            }
+        _ensure_mcp()
+        logger.info('MCP Server HTTP trigger function processed a request.')
 
-            # Primary event uses 'event: message' then 'data: <json>'
-            sse_body = 'event: message\n' + 'data: ' + \
-                json.dumps(rpc_payload) + "\n\n"
-
-            # Final marker event to signal completion (also JSON-RPC style)
-            final_rpc = {"jsonrpc": "2.0", "id": 0, "result": {"done": True}}
-            final_event = 'event: message\n' + \
-                'data: ' + json.dumps(final_rpc) + "\n\n"
-
-            full_body = sse_body + final_event
-
-            # Return as text/event-stream without Content-Length to allow
-            # chunked transfer encoding (GitHub uses chunked); Postman handles this.
-            headers = {
-                'Cache-Control': 'no-cache',
-                # Signal the client that the server will close the connection
-                # after the SSE events. Some clients (Postman MCP) rely on
-                # Connection: close to detect the end of the stream.
-                'Connection': 'close'
-            }
-            return func.HttpResponse(body=full_body, mimetype="text/event-stream", status_code=200, headers=headers)
+        # Check if MCP is available. Do not abort here — we have a
+        # fallback metadata generator in `_get_tools()` that can
+        # populate capabilities for clients (useful for local testing
+        # when the MCP runtime isn't importable).
+        if mcp is None:
+            logger.warning(
+                "MCP runtime not available; using fallback tool metadata")
 
         # If the client specifically asked for Server-Sent Events (SSE),
         # respond with a single SSE message containing the capabilities/tools.
         # This makes Postman "Load capabilities" work which expects
         # Content-Type: text/event-stream.
-        accept_header = req.headers.get(
-            'Accept') or req.headers.get('accept') or ''
+        # req.headers is case-insensitive, so one lookup covers 'accept' too
+        wants_sse = 'text/event-stream' in (req.headers.get('Accept') or '').lower()
         try:
-            if isinstance(accept_header, str) and 'text/event-stream' in accept_header.lower():
+            if wants_sse:
                 tools = await _get_tools()
                 return _make_sse_response(tools)
         except Exception:
@@ -238,273 +598,52 @@ async def main(req: func.HttpRequest) -> func.HttpResponse:
             logger.exception(
                 "Failed to produce SSE response; falling back to JSON")
 
-        if method == 'GET':
-            # Return server information and available tools
+        request_data = None
+        route = None
+        if method == 'POST':
+            # Parse the raw body directly; get_json() always goes through
+            # the stdlib parser. orjson's decode error is a ValueError too.
+            body = req.get_body()
             try:
-                # Get available tools (FastMCP or fallback)
-                tools = await _get_tools()
-
-                # If client requested SSE via Accept header, return SSE payload
-                if isinstance(accept_header, str) and 'text/event-stream' in accept_header.lower():
-                    return _make_sse_response(tools)
-
-                response_data = {
-                    "status": "success",
-                    "message": "MCP Server is running on Azure Functions",
-                    "server_name": getattr(mcp, 'name', 'BMI and SQL Server - Azure Functions'),
-                    "available_tools": tools,
-                    "tool_count": len(tools)
-                }
-
-                return func.HttpResponse(
-                    json.dumps(response_data, indent=2),
-                    mimetype="application/json",
-                    status_code=200
-                )
-            except Exception as e:
-                logger.error(
-                    f"Error getting tools list: {str(e)}", exc_info=True)
-                logger.error(f"MCP object type: {type(mcp)}")
-                logger.error(f"MCP attributes: {dir(mcp)}")
-                response_data = {
-                    "status": "success",
-                    "message": "MCP Server is running on Azure Functions",
-                    "server_name": getattr(mcp, 'name', 'Unknown'),
-                    "available_tools": [],
-                    "tool_count": 0,
-                    "error": f"Could not load tools: {str(e)}"
-                }
-
+                request_data = _loads(body) if body else None
+            except ValueError as e:
                 return func.HttpResponse(
-                    json.dumps(response_data, indent=2),
+                    _dumps(
+                        {"error": f"Invalid JSON in request body: {str(e)}"}),
                     mimetype="application/json",
-                    status_code=200
+                    status_code=400
                 )
 
-        elif method == 'POST':
-            # Handle tool execution requests
-            try:
-                request_data = req.get_json()
-
-                if not request_data:
-                    return func.HttpResponse(
-                        json.dumps(
-                            {"error": "Request body must be valid JSON"}),
-                        mimetype="application/json",
-                        status_code=400
-                    )
-
-                tool_name = request_data.get('tool')
-                arguments = request_data.get('arguments', {})
-
-                # Support JSON-RPC style tools/list and tools/call requests per MCP spec
-                # Also preserve the simpler {"action":"list_tools"} for convenience
-                rpc_method = request_data.get('method')
-                action = request_data.get('action')
-
-                if action == 'list_tools' or rpc_method == 'tools/list':
-                    try:
-                        tools = await _get_tools()
-
-                        # If JSON-RPC request, wrap in jsonrpc response
-                        if rpc_method == 'tools/list':
-                            rpc_response = {
-                                "jsonrpc": "2.0",
-                                "id": request_data.get('id'),
-                                "result": {
-                                    "tools": tools,
-                                    "nextCursor": None
-                                }
-                            }
-                            return func.HttpResponse(json.dumps(rpc_response, indent=2), mimetype="application/json", status_code=200)
-
-                        response_data = {
-                            "status": "success",
-                            "message": "MCP Server is running on Azure Functions",
-                            "server_name": getattr(mcp, 'name', 'BMI and SQL Server - Azure Functions'),
-                            "available_tools": tools,
-                            "tool_count": len(tools)
-                        }
-
-                        return func.HttpResponse(json.dumps(response_data, indent=2), mimetype="application/json", status_code=200)
-                    except Exception as e:
-                        logger.error(
-                            f"Error getting tools list (POST action): {str(e)}", exc_info=True)
-                        return func.HttpResponse(json.dumps({"status": "error", "message": f"Could not load tools: {str(e)}"}), mimetype="application/json", status_code=500)
-
-                # Handle JSON-RPC tool call requests: {"jsonrpc":"2.0","method":"tools/call","params":{...}}
-                if rpc_method == 'tools/call':
-                    params = request_data.get('params', {})
-                    name = params.get('name')
-                    arguments = params.get('arguments', {})
-                    if not name:
-                        return func.HttpResponse(json.dumps({"jsonrpc": "2.0", "id": request_data.get('id'), "error": {"code": -32602, "message": "Missing 'name' in params"}}), mimetype="application/json", status_code=400)
-                    try:
-                        result = await _maybe_await(mcp.call_tool(name, arguments))
-                        # Normalize into MCP result shape: {content: [...], isError: false}
-                        content_items = []
-                        try:
-                            # If result is JSON string, include as text content
-                            result_text = None
-                            if isinstance(result, tuple) and len(result) >= 1:
-                                result_text = result[0][0].text if (isinstance(result[0], list) and len(
-                                    result[0]) > 0 and hasattr(result[0][0], 'text')) else str(result)
-                            elif hasattr(result, 'text'):
-                                result_text = result.text
-                            elif isinstance(result, str):
-                                result_text = result
-                            else:
-                                result_text = str(result)
-                            content_items.append(
-                                {"type": "text", "text": result_text})
-                        except Exception:
-                            content_items.append(
-                                {"type": "text", "text": str(result)})
-
-                        rpc_response = {"jsonrpc": "2.0", "id": request_data.get(
-                            'id'), "result": {"content": content_items, "isError": False}}
-                        return func.HttpResponse(json.dumps(rpc_response, indent=2), mimetype="application/json", status_code=200)
-                    except Exception as e:
-                        rpc_error = {"jsonrpc": "2.0", "id": request_data.get(
-                            'id'), "error": {"code": -32000, "message": str(e)}}
-                        return func.HttpResponse(json.dumps(rpc_error, indent=2), mimetype="application/json", status_code=500)
-
-                if not tool_name:
-                    return func.HttpResponse(
-                        json.dumps(
-                            {"error": "Missing 'tool' parameter in request"}),
-                        mimetype="application/json",
-                        status_code=400
-                    )
-
-                # Check if tool exists and execute it
-                try:
-                    # Use MCP's call_tool method
-                    logger.info(
-                        f"Executing tool: {tool_name} with arguments: {arguments}")
-                    result = await _maybe_await(mcp.call_tool(tool_name, arguments))
-
-                    # Handle the FastMCP result structure
-                    # FastMCP returns a tuple: ([TextContent], metadata)
-                    result_text = None
-
-                    if isinstance(result, tuple) and len(result) >= 2:
-                        content_list, metadata = result[0], result[1]
-
-                        # Check metadata first for 'result' key
-                        if isinstance(metadata, dict) and 'result' in metadata:
-                            result_text = metadata['result']
-                        # Otherwise extract from TextContent list
-                        elif isinstance(content_list, list) and len(content_list) > 0:
-                            text_content = content_list[0]
-                            if hasattr(text_content, 'text'):
-                                result_text = text_content.text
-                            else:
-                                result_text = str(text_content)
-                        else:
-                            result_text = str(result)
-
-                    # Check for CallToolResult with content
-                    elif hasattr(result, 'content') and result.content:
-                        if isinstance(result.content, list) and len(result.content) > 0:
-                            text_content = result.content[0]
-                            if hasattr(text_content, 'text'):
-                                result_text = text_content.text
-                            else:
-                                result_text = str(text_content)
-                        else:
-                            result_text = str(result.content)
-
-                    # Check for direct text attribute
-                    elif hasattr(result, 'text'):
-                        result_text = result.text
-
-                    # Check if it's already a string
-                    elif isinstance(result, str):
-                        result_text = result
-
-                    # Fallback to string conversion
-                    else:
-                        result_text = str(result)
-
-                    # Try to parse as JSON if it looks like JSON
-                    try:
-                        parsed_result = json.loads(result_text)
-                    except (json.JSONDecodeError, TypeError):
-                        parsed_result = result_text
-
-                    response_data = {
-                        "status": "success",
-                        "tool": tool_name,
-                        "result": parsed_result,
-                        "arguments": arguments
-                    }
-
-                    return func.HttpResponse(
-                        json.dumps(response_data, indent=2),
-                        mimetype="application/json",
-                        status_code=200
-                    )
-
-                except Exception as e:
-                    # Handle various types of tool execution errors
-                    error_msg = str(e)
-                    if "not found" in error_msg.lower():
-                        # Tool not found error
-                        tools_list = await _maybe_await(mcp.list_tools())
-                        available_tools = [tool.name for tool in tools_list]
-                        return func.HttpResponse(
-                            json.dumps({
-                                "error": f"Tool '{tool_name}' not found",
-                                "available_tools": available_tools
-                            }),
-                            mimetype="application/json",
-                            status_code=404
-                        )
-                    elif "argument" in error_msg.lower():
-                        # Invalid arguments error
-                        return func.HttpResponse(
-                            json.dumps({
-                                "error": f"Invalid arguments for tool '{tool_name}': {error_msg}",
-                                "tool": tool_name,
-                                "provided_arguments": arguments
-                            }),
-                            mimetype="application/json",
-                            status_code=400
-                        )
-                    else:
-                        # General execution error
-                        logger.error(
-                            f"Error executing tool '{tool_name}': {error_msg}")
-                        return func.HttpResponse(
-                            json.dumps({
-                                "error": f"Tool execution failed: {error_msg}",
-                                "tool": tool_name,
-                                "arguments": arguments
-                            }),
-                            mimetype="application/json",
-                            status_code=500
-                        )
-
-            except ValueError as e:
+            if not request_data or not isinstance(request_data, dict):
                 return func.HttpResponse(
-                    json.dumps(
-                        {"error": f"Invalid JSON in request body: {str(e)}"}),
+                    _dumps(
+                        {"error": "Request body must be valid JSON"}),
                     mimetype="application/json",
                     status_code=400
                 )
 
-        else:
+            # JSON-RPC requests route on 'method'. The simpler
+            # {"action": "list_tools"} form is kept for convenience and
+            # wins over any 'method' in the same body. A non-string 'method'
+            # can't name a route and takes the default handler.
+            if request_data.get('action') == 'list_tools':
+                route = 'tools/list'
+            elif isinstance(request_data.get('method'), str):
+                route = request_data['method']
+
+        handler = HANDLERS.get((method, route)) or HANDLERS.get((method, None))
+        if handler is None:
             return func.HttpResponse(
-                json.dumps({"error": f"Method '{method}' not supported"}),
+                _dumps({"error": f"Method '{method}' not supported"}),
                 mimetype="application/json",
                 status_code=405
             )
+        return await handler(req, request_data)
 
     except Exception as e:
         logger.error(f"Unexpected error in MCP Server function: {str(e)}")
         return func.HttpResponse(
-            json.dumps({
+            _dumps({
                 "error": "Internal server error",
                 "details": str(e)
             }),
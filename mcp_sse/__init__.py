@@ -1,188 +1,312 @@
-import mcp_server as shared_mcp_server
-from mcp_server import mcp, logger
 import azure.functions as func
-import json
+import asyncio
+import functools
+import inspect
 import logging
-import sys
 import os
-import asyncio
-from typing import Dict, Any, AsyncGenerator
+import sys
+import time
+from datetime import datetime, timezone
+
+# Prefer orjson when installed: its C encoder handles the small per-event
+# dicts much faster than the stdlib and returns bytes ready for the body.
+try:
+    import orjson
+
+    def _dumps(data, pretty=False):
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if pretty else None)
+except ImportError:
+    import json
+
+    def _dumps(data, pretty=False):
+        return json.dumps(data, indent=2 if pretty else None).encode('utf-8')
+
+# SSE framing: each event is "data: <json>" terminated by a blank line
+SSE_PREFIX = b"data: "
+SSE_SUFFIX = b"\n\n"
+
+
+def _sse_event(data):
+    """Encode one SSE event"""
+    return SSE_PREFIX + _dumps(data) + SSE_SUFFIX
+
 
 # Add the shared_code directory to the path
-sys.path.insert(0, os.path.join(
-    os.path.dirname(__file__), '..', 'shared_code'))
+shared_code_path = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..', 'shared_code'))
+if shared_code_path not in sys.path:
+    sys.path.insert(0, shared_code_path)
+
+# The shared MCP server (FastMCP, SQL helpers, ...) is imported on the first
+# request so the Functions host loads this function without paying for it.
+mcp = None
+logger = logging.getLogger(__name__)
+
+# Registered tools keyed by interned name; requests intern their tool name
+# too, so the dict probe matches on identity instead of comparing strings.
+# Built by _tool_table() on the first tool call.
+_TOOLS = None
+_TOOL_NAMES = frozenset()
+
+
+def _ensure_mcp():
+    """Import the shared MCP server once and return it"""
+    global mcp, logger
+    if mcp is None:
+        # Import from shared_code - avoid naming conflict
+        import mcp_server as shared_mcp_server
+        mcp = shared_mcp_server.mcp
+        logger = shared_mcp_server.logger
+    return mcp
 
-# Import from shared_code - avoid naming conflict
-mcp = shared_mcp_server.mcp
-logger = shared_mcp_server.logger
+
+def _tool_table():
+    """
+    Return the registered tools keyed by interned name, building it once.
+
+    FastMCP keeps its tools in _tool_manager; a server without one (older
+    releases, the no-MCP fallback) is read from _tools, or has no tools.
+    """
+    global _TOOLS, _TOOL_NAMES
+    if _TOOLS is None:
+        manager = getattr(mcp, '_tool_manager', None)
+        if manager is not None:
+            tools = {name: getattr(tool, 'fn', tool)
+                     for name, tool in getattr(manager, '_tools', {}).items()}
+        else:
+            tools = getattr(mcp, '_tools', None) or {}
+        _TOOLS = {sys.intern(name): tool for name, tool in tools.items()}
+        _TOOL_NAMES = frozenset(_TOOLS)
+    return _TOOLS
+
+
+def _event_time():
+    """Current time for an SSE event as (ts_ns, ISO-8601 UTC timestamp)"""
+    ts_ns = time.time_ns()
+    seconds, nanos = divmod(ts_ns, 1_000_000_000)
+    stamp = datetime.fromtimestamp(seconds, timezone.utc).replace(
+        microsecond=nanos // 1000)
+    return ts_ns, stamp.isoformat()
+
+
+# Upper bound on a single tool call, well inside the host's functionTimeout
+TOOL_TIMEOUT = 120
+
+
+async def _run_tool(tool_name, tool_func, arguments):
+    """
+    Run a registered tool without blocking the worker's event loop.
+
+    Async tools are awaited directly; sync tools (SQL, network probes) run
+    in a worker thread so other invocations on this instance keep moving.
+    """
+    if inspect.iscoroutinefunction(tool_func):
+        call = tool_func(**arguments)
+    else:
+        call = asyncio.to_thread(tool_func, **arguments)
+    try:
+        return await asyncio.wait_for(call, timeout=TOOL_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise TimeoutError(
+            f"Tool {tool_name} did not finish within {TOOL_TIMEOUT} seconds")
+
+
+@functools.lru_cache(maxsize=1)
+def _available_tools_json():
+    """Encoded list of registered tool names; tools are registered at startup"""
+    return _dumps(list(_TOOLS))
+
+
+def _tool_not_found_event(tool_name):
+    """SSE error event for an unknown tool, splicing in the cached tool list"""
+    return (SSE_PREFIX + b'{"error":' + _dumps(f'Tool {tool_name} not found') +
+            b',"available_tools":' + _available_tools_json() + b'}' + SSE_SUFFIX)
+
+
+@functools.lru_cache(maxsize=1)
+def _endpoint_info_body():
+    """Encoded GET response; it only depends on the (fixed) server name"""
+    response_data = {
+        "status": "success",
+        "message": "MCP Server SSE endpoint is available",
+        "server_name": getattr(mcp, 'name', None) or 'Unknown',
+        "endpoint_type": "Server-Sent Events (SSE)",
+        "usage": {
+            "description": "Send POST requests to execute MCP tools with real-time responses",
+            "content_type": "text/event-stream",
+            "format": "SSE format with data: prefixed JSON"
+        }
+    }
+    return _dumps(response_data, pretty=True)
+
+
+def log_unhandled(handler):
+    """Turn an unexpected exception from the wrapped handler into a logged SSE 500"""
+    @functools.wraps(handler)
+    async def wrapper(req):
+        try:
+            return await handler(req)
+        except Exception as e:
+            logger.error(f"Unexpected error in MCP SSE function: {str(e)}")
+            error_event = _sse_event({'error': 'Internal server error', 'details': str(e)})
+            return func.HttpResponse(
+                error_event,
+                mimetype="text/event-stream",
+                status_code=500,
+                headers={"Cache-Control": "no-cache", "Connection": "keep-alive"}
+            )
+    return wrapper
 
 
+@log_unhandled
 async def main(req: func.HttpRequest) -> func.HttpResponse:
     """
     Azure Function HTTP trigger for MCP Server with Server-Sent Events (SSE)
 
     This function provides SSE support for real-time MCP communication.
     """
+    _ensure_mcp()
     logger.info('MCP Server SSE HTTP trigger function processed a request.')
 
-    try:
-        method = req.method.upper()
-
-        if method == 'GET':
-            # Return SSE endpoint information
-            response_data = {
-                "status": "success",
-                "message": "MCP Server SSE endpoint is available",
-                "server_name": mcp.name,
-                "endpoint_type": "Server-Sent Events (SSE)",
-                "usage": {
-                    "description": "Send POST requests to execute MCP tools with real-time responses",
-                    "content_type": "text/event-stream",
-                    "format": "SSE format with data: prefixed JSON"
-                }
-            }
+    method = req.method.upper()
+
+    if method == 'GET':
+        # Return SSE endpoint information
+        return func.HttpResponse(
+            _endpoint_info_body(),
+            mimetype="application/json",
+            status_code=200
+        )
+
+    elif method == 'POST':
+        # Handle SSE tool execution
+        try:
+            request_data = req.get_json()
+        except ValueError as e:
+            error_event = _sse_event({'error': f'Invalid JSON in request body: {str(e)}'})
+            return func.HttpResponse(
+                error_event,
+                mimetype="text/event-stream",
+                status_code=400,
+                headers={"Cache-Control": "no-cache",
+                         "Connection": "keep-alive"}
+            )
 
+        if not request_data:
+            error_event = _sse_event({'error': 'Request body must be valid JSON'})
             return func.HttpResponse(
-                json.dumps(response_data, indent=2),
-                mimetype="application/json",
-                status_code=200
+                error_event,
+                mimetype="text/event-stream",
+                status_code=400,
+                headers={"Cache-Control": "no-cache",
+                         "Connection": "keep-alive"}
             )
 
-        elif method == 'POST':
-            # Handle SSE tool execution
-            try:
-                request_data = req.get_json()
-
-                if not request_data:
-                    error_event = f"data: {json.dumps({'error': 'Request body must be valid JSON'})}\\n\\n"
-                    return func.HttpResponse(
-                        error_event,
-                        mimetype="text/event-stream",
-                        status_code=400,
-                        headers={"Cache-Control": "no-cache",
-                                 "Connection": "keep-alive"}
-                    )
-
-                tool_name = request_data.get('tool')
-                arguments = request_data.get('arguments', {})
-
-                if not tool_name:
-                    error_event = f"data: {json.dumps({'error': 'Missing tool parameter in request'})}\\n\\n"
-                    return func.HttpResponse(
-                        error_event,
-                        mimetype="text/event-stream",
-                        status_code=400,
-                        headers={"Cache-Control": "no-cache",
-                                 "Connection": "keep-alive"}
-                    )
-
-                # Check if tool exists
-                if tool_name not in mcp._tools:
-                    available_tools = list(mcp._tools.keys())
-                    error_data = {
-                        'error': f'Tool {tool_name} not found',
-                        'available_tools': available_tools
-                    }
-                    error_event = f"data: {json.dumps(error_data)}\n\n"
-                    return func.HttpResponse(
-                        error_event,
-                        mimetype="text/event-stream",
-                        status_code=404,
-                        headers={"Cache-Control": "no-cache",
-                                 "Connection": "keep-alive"}
-                    )
-
-                # Create SSE response stream
-                def generate_sse_response():
-                    try:
-                        # Send start event
-                        start_event = {
-                            "event": "start",
-                            "tool": tool_name,
-                            "arguments": arguments,
-                            "timestamp": str(__import__('datetime').datetime.utcnow())
-                        }
-                        yield f"data: {json.dumps(start_event)}\\n\\n"
-
-                        # Execute the tool
-                        tool_func = mcp._tools[tool_name]
-
-                        if arguments:
-                            result = tool_func(**arguments)
-                        else:
-                            result = tool_func()
-
-                        # Send result event
-                        result_event = {
-                            "event": "result",
-                            "tool": tool_name,
-                            "status": "success",
-                            "result": result,
-                            "timestamp": str(__import__('datetime').datetime.utcnow())
-                        }
-                        yield f"data: {json.dumps(result_event)}\\n\\n"
-
-                        # Send end event
-                        end_event = {
-                            "event": "end",
-                            "tool": tool_name,
-                            "status": "completed",
-                            "timestamp": str(__import__('datetime').datetime.utcnow())
-                        }
-                        yield f"data: {json.dumps(end_event)}\\n\\n"
-
-                    except Exception as e:
-                        # Send error event
-                        error_event = {
-                            "event": "error",
-                            "tool": tool_name,
-                            "error": str(e),
-                            "timestamp": str(__import__('datetime').datetime.utcnow())
-                        }
-                        yield f"data: {json.dumps(error_event)}\\n\\n"
-
-                # Generate the complete SSE response
-                sse_response = ''.join(generate_sse_response())
-
-                return func.HttpResponse(
-                    sse_response,
-                    mimetype="text/event-stream",
-                    status_code=200,
-                    headers={
-                        "Cache-Control": "no-cache",
-                        "Connection": "keep-alive",
-                        "Access-Control-Allow-Origin": "*",
-                        "Access-Control-Allow-Headers": "Content-Type",
-                        "Access-Control-Allow-Methods": "GET, POST, OPTIONS"
-                    }
-                )
-
-            except ValueError as e:
-                error_event = f"data: {json.dumps({'error': f'Invalid JSON in request body: {str(e)}'})}\\n\\n"
-                return func.HttpResponse(
-                    error_event,
-                    mimetype="text/event-stream",
-                    status_code=400,
-                    headers={"Cache-Control": "no-cache",
-                             "Connection": "keep-alive"}
-                )
+        tool_name = request_data.get('tool')
+        arguments = request_data.get('arguments', {})
 
-        else:
-            error_event = f"data: {json.dumps({'error': f'Method {method} not supported'})}\\n\\n"
+        if not tool_name:
+            error_event = _sse_event({'error': 'Missing tool parameter in request'})
             return func.HttpResponse(
                 error_event,
                 mimetype="text/event-stream",
-                status_code=405,
+                status_code=400,
                 headers={"Cache-Control": "no-cache",
                          "Connection": "keep-alive"}
             )
 
-    except Exception as e:
-        logger.error(f"Unexpected error in MCP SSE function: {str(e)}")
-        error_event = f"data: {json.dumps({'error': 'Internal server error', 'details': str(e)})}\\n\\n"
+        # Check if tool exists
+        tools = _tool_table()
+        if tool_name not in _TOOL_NAMES:
+            error_event = _tool_not_found_event(tool_name)
+            return func.HttpResponse(
+                error_event,
+                mimetype="text/event-stream",
+                status_code=404,
+                headers={"Cache-Control": "no-cache",
+                         "Connection": "keep-alive"}
+            )
+        tool_name = sys.intern(tool_name)
+        tool_func = tools[tool_name]
+
+        # Start event. Events carry both the ISO "timestamp" clients
+        # already read and the integer "ts_ns" (Unix epoch ns) of the same
+        # instant.
+        started_ns, started_at = _event_time()
+        start_event = {
+            "event": "start",
+            "tool": tool_name,
+            "arguments": arguments,
+            "timestamp": started_at,
+            "ts_ns": started_ns
+        }
+
+        # The function.json programming model only accepts a str/bytes
+        # body, so nothing is streamed: the events are built as a list and
+        # encoded in one pass, without an async generator in between.
+        try:
+            # Execute the tool
+            result = await _run_tool(tool_name, tool_func, arguments or {})
+
+            # The result and end events go out together, so
+            # they share one completion timestamp
+            finished_ns, finished_at = _event_time()
+
+            events = [
+                start_event,
+                {
+                    "event": "result",
+                    "tool": tool_name,
+                    "status": "success",
+                    "result": result,
+                    "timestamp": finished_at,
+                    "ts_ns": finished_ns
+                },
+                {
+                    "event": "end",
+                    "tool": tool_name,
+                    "status": "completed",
+                    "timestamp": finished_at,
+                    "ts_ns": finished_ns
+                },
+            ]
+            payloads = [_dumps(event) for event in events]
+
+        except Exception as e:
+            # Error event
+            failed_ns, failed_at = _event_time()
+            error_event = {
+                "event": "error",
+                "tool": tool_name,
+                "error": str(e),
+                "timestamp": failed_at,
+                "ts_ns": failed_ns
+            }
+            payloads = [_dumps(start_event), _dumps(error_event)]
+
+        # Frame every event in a single join, with no per-event copies
+        sse_response = b''.join([part for payload in payloads
+                                 for part in (SSE_PREFIX, payload, SSE_SUFFIX)])
+
+        return func.HttpResponse(
+            sse_response,
+            mimetype="text/event-stream",
+            status_code=200,
+            headers={
+                "Cache-Control": "no-cache",
+                "Connection": "keep-alive",
+                "Access-Control-Allow-Origin": "*",
+                "Access-Control-Allow-Headers": "Content-Type",
+                "Access-Control-Allow-Methods": "GET, POST, OPTIONS"
+            }
+        )
+
+    else:
+        error_event = _sse_event({'error': f'Method {method} not supported'})
         return func.HttpResponse(
             error_event,
             mimetype="text/event-stream",
-            status_code=500,
-            headers={"Cache-Control": "no-cache", "Connection": "keep-alive"}
+            status_code=405,
+            headers={"Cache-Control": "no-cache",
+                     "Connection": "keep-alive"}
         )
@@ -9,9 +9,13 @@ This script checks staged changes for:
 
 It returns non-zero and prints offending files/patterns to block the commit.
 """
+import hashlib
+import multiprocessing
+import os
 import re
 import subprocess
 import sys
+from concurrent.futures import ProcessPoolExecutor
 
 PATTERNS = [
     (re.compile(r"\bgsk\b", re.IGNORECASE), "GSK org reference"),
@@ -22,39 +26,266 @@ PATTERNS = [
      "Known test password"),
 ]
 
+# Backtracking-safe spellings for the re engine, keyed by PATTERNS index.
+# The address pattern only starts at the beginning of a run of address
+# characters and never gives characters back, so a long run with no
+# '@gsk.com' is scanned once instead of once per starting offset (quadratic).
+RE_OVERRIDES = {
+    1: r"(?<![\w.+-])[\w.+-]++@gsk\.com",
+}
 
-def get_staged_files():
+# What each blob is actually checked with: every pattern searched on its own
+# over the decoded text, so overlapping hits (the 'gsk' inside a @gsk.com
+# address) each get their label and \w stays Unicode-aware (josé@gsk.com)
+SEARCH_PATTERNS = [re.compile(RE_OVERRIDES.get(i, pat.pattern), pat.flags)
+                   for i, (pat, _name) in enumerate(PATTERNS)]
+
+# Hyperscan only preselects patterns (bytes, ASCII \w), so the address
+# pattern is loosened to its domain and confirmed by SEARCH_PATTERNS
+HS_GATE_OVERRIDES = {
+    1: r"@gsk\.com",
+}
+
+# Git's own heuristic: a NUL byte near the start means a binary file
+BINARY_SNIFF_BYTES = 8192
+
+# Every pattern contains one of these literals (compared case-insensitively),
+# so a blob containing none of them can't match and skips the regex
+PREFILTER_NEEDLES = (b"gsk", b"sk-", b"password")
+
+# The prefilter lowercases a blob window by window so a large blob costs a
+# bounded extra copy rather than a second blob-sized buffer; windows overlap
+# by enough that a needle spanning a boundary is still seen
+PREFILTER_WINDOW_BYTES = 1 << 20
+PREFILTER_OVERLAP = max(len(needle) for needle in PREFILTER_NEEDLES) - 1
+
+# Below this many staged files, starting worker processes costs more than
+# scanning serially
+PARALLEL_MIN_FILES = 4
+
+# Blobs are read and handed to the workers in batches of about this many
+# bytes, so memory stays bounded however much is staged
+SCAN_BATCH_BYTES = 64 << 20
+
+# Larger blobs (media, archives, vendored bundles) are not scanned; they are
+# drained from git unread and block the commit as unchecked unless
+# ALLOW_LARGE_ENV is set to 1
+SCAN_MAX_BLOB_BYTES = 32 << 20
+ALLOW_LARGE_ENV = "PRECOMMIT_ALLOW_LARGE_FILES"
+READ_CHUNK_BYTES = 1 << 20
+
+# Workers start while git cat-file is still streaming blobs. A plain fork
+# would hand each of them a copy of cat-file's stdin pipe, which then never
+# sees EOF; forkserver (or spawn, off Linux) workers don't inherit it.
+POOL_CONTEXT = (multiprocessing.get_context("forkserver")
+                if "forkserver" in multiprocessing.get_all_start_methods() else None)
+
+
+# Blob OIDs that already scanned clean, oldest first. Re-commits after a
+# rebase or amend stage mostly identical blobs, which can then be skipped.
+CLEAN_CACHE_PATH = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+    "precommit_check", "clean_oids")
+CLEAN_CACHE_MAX = 10000
+
+# First line of the cache file; a blob that was clean under a different set
+# of patterns has to be scanned again, so editing PATTERNS invalidates it
+PATTERNS_FINGERPRINT = hashlib.sha1(
+    repr([(pat.pattern, pat.flags) for pat in SEARCH_PATTERNS]).encode()).hexdigest()
+
+
+def _compile_hyperscan():
+    """Compile PATTERNS into a Hyperscan database, or None when unavailable"""
+    try:
+        import hyperscan
+    except ImportError:
+        return None
+    db = hyperscan.Database()
+    db.compile(
+        expressions=[HS_GATE_OVERRIDES.get(i, pat.pattern).encode()
+                     for i, (pat, _name) in enumerate(PATTERNS)],
+        ids=list(range(len(PATTERNS))),
+        elements=len(PATTERNS),
+        # SINGLEMATCH: report each pattern at most once per scan
+        flags=[hyperscan.HS_FLAG_SINGLEMATCH |
+               (hyperscan.HS_FLAG_CASELESS if pat.flags & re.IGNORECASE else 0)
+               for pat, _name in PATTERNS])
+    return db
+
+
+# Hyperscan finds the candidate patterns in one DFA-style pass with no
+# backtracking; the literal prefilter is used when python-hyperscan isn't
+# installed
+HS_DB = _compile_hyperscan()
+
+
+def get_staged_blobs():
+    """Return (path, blob_oid) for every staged file that has content"""
+    # Deleted (and unmerged) paths have no staged content; let git drop them
     res = subprocess.run(
-        ["git", "diff", "--cached", "--name-only"], capture_output=True, text=True)
+        ["git", "diff", "--cached", "--raw", "-z", "--no-abbrev",
+         "--diff-filter=ACMRT"], capture_output=True)
     if res.returncode != 0:
         print("Failed to get staged files")
         sys.exit(1)
-    return [f for f in res.stdout.splitlines() if f.strip()]
+
+    # -z records: ":<old mode> <new mode> <old oid> <new oid> <status>\0<path>\0",
+    # with a second path for renames and copies
+    fields = res.stdout.split(b"\0")
+    blobs = []
+    i = 0
+    while i < len(fields) - 1:
+        meta = fields[i].decode().split()
+        status = meta[4]
+        paths = fields[i + 1:i + (3 if status[0] in "RC" else 2)]
+        i += 1 + len(paths)
+        blobs.append((paths[-1].decode("utf-8", "replace"), meta[3]))
+    return blobs
 
 
-def scan_file(path):
+def read_blobs(blobs):
+    """
+    Yield ((path, oid), content bytes) for each staged blob from one git cat-file process.
+
+    Content is None for blobs over SCAN_MAX_BLOB_BYTES, which are skipped.
+    Blobs git reports missing are not yielded.
+    """
+    proc = subprocess.Popen(["git", "cat-file", "--batch"],
+                            stdin=subprocess.PIPE, stdout=subprocess.PIPE)
     try:
-        with open(path, "r", errors="ignore") as fh:
-            content = fh.read()
-    except Exception:
+        for path, oid in blobs:
+            proc.stdin.write(oid.encode() + b"\n")
+            proc.stdin.flush()
+            header = proc.stdout.readline().split()
+            if len(header) != 3:  # "<oid> missing"
+                continue
+            size = int(header[2])
+            if size > SCAN_MAX_BLOB_BYTES:
+                while size:
+                    size -= len(proc.stdout.read(min(size, READ_CHUNK_BYTES)))
+                content = None
+            else:
+                content = proc.stdout.read(size)
+            proc.stdout.read(1)  # trailing newline after each object
+            yield (path, oid), content
+    finally:
+        proc.stdin.close()
+        proc.wait()
+
+
+def batch_blobs(blobs):
+    """Group (blob, content) pairs into lists of about SCAN_BATCH_BYTES"""
+    batch = []
+    batch_bytes = 0
+    for blob, content in blobs:
+        batch.append((blob, content))
+        batch_bytes += len(content or b"")
+        if batch_bytes >= SCAN_BATCH_BYTES:
+            yield batch
+            batch = []
+            batch_bytes = 0
+    if batch:
+        yield batch
+
+
+def may_match(content):
+    """Return False when the blob can't contain any pattern (prefilter)"""
+    for start in range(0, len(content), PREFILTER_WINDOW_BYTES):
+        window = content[start:start + PREFILTER_WINDOW_BYTES + PREFILTER_OVERLAP].lower()
+        if any(needle in window for needle in PREFILTER_NEEDLES):
+            return True
+    return False
+
+
+def scan_content(content):
+    """Return (label, pattern) for each banned pattern found in a blob, None if skipped"""
+    if content is None:
+        return None
+    if b"\0" in content[:BINARY_SNIFF_BYTES]:
         return []
-    hits = []
-    for pat, name in PATTERNS:
-        if pat.search(content):
-            hits.append((name, pat.pattern))
-    return hits
+    if HS_DB is not None:
+        candidates = set()
+
+        def on_match(pattern_id, start, end, flags, context):
+            candidates.add(pattern_id)
+
+        HS_DB.scan(content, match_event_handler=on_match)
+    # Most blobs are clean; substring search rejects them far faster than
+    # the regex engine can
+    elif may_match(content):
+        candidates = range(len(PATTERNS))
+    else:
+        return []
+    if not candidates:
+        return []
+
+    text = content.decode("utf-8", "ignore")
+    return [(PATTERNS[i][1], PATTERNS[i][0].pattern) for i in sorted(candidates)
+            if SEARCH_PATTERNS[i].search(text)]
+
+
+def scan_blobs(staged):
+    """Yield ((path, oid), hits) for every scanned blob, using all cores for larger commits"""
+    blobs = read_blobs(staged)
+    if len(staged) < PARALLEL_MIN_FILES:
+        for blob, content in blobs:
+            yield blob, scan_content(content)
+        return
+
+    with ProcessPoolExecutor(mp_context=POOL_CONTEXT) as executor:
+        for batch in batch_blobs(blobs):
+            results = executor.map(
+                scan_content, [content for _blob, content in batch], chunksize=8)
+            yield from zip([blob for blob, _content in batch], results)
+
+
+def load_clean_oids():
+    """Return the cached clean blob OIDs as an ordered dict (oldest first)"""
+    try:
+        with open(CLEAN_CACHE_PATH) as fh:
+            lines = fh.read().split()
+    except OSError:
+        return {}
+    if not lines or lines[0] != PATTERNS_FINGERPRINT:
+        return {}
+    return dict.fromkeys(lines[1:])
+
+
+def save_clean_oids(clean, oids):
+    """Mark oids as most recently clean and write the bounded cache back"""
+    for oid in oids:
+        clean.pop(oid, None)
+        clean[oid] = None
+    keep = list(clean)[-CLEAN_CACHE_MAX:]
+    try:
+        os.makedirs(os.path.dirname(CLEAN_CACHE_PATH), exist_ok=True)
+        tmp_path = f"{CLEAN_CACHE_PATH}.{os.getpid()}"
+        with open(tmp_path, "w") as fh:
+            fh.write("\n".join([PATTERNS_FINGERPRINT, *keep]) + "\n")
+        os.replace(tmp_path, CLEAN_CACHE_PATH)
+    except OSError:
+        pass  # the cache is only an optimization
 
 
 def main():
-    staged = get_staged_files()
+    staged = get_staged_blobs()
     if not staged:
         return 0
 
+    clean = load_clean_oids()
+    to_scan = [(path, oid) for path, oid in staged if oid not in clean]
+
+    # Scan exactly what is being committed, not the working tree
     blocked = {}
-    for path in staged:
-        hits = scan_file(path)
-        if hits:
+    skipped = set()
+    scanned_clean = []
+    for (path, oid), hits in scan_blobs(to_scan):
+        if hits is None:
+            skipped.add(path)
+        elif hits:
             blocked[path] = hits
+        else:
+            scanned_clean.append(oid)
 
     if blocked:
         print("Pre-commit check failed — potential secrets or banned patterns detected:")
@@ -65,6 +296,19 @@ def main():
         print("\nPlease remove these items or move secrets to environment configuration/Key Vault before committing.")
         return 1
 
+    # A blob that wasn't scanned can't be passed as clean
+    if skipped:
+        allowed = os.environ.get(ALLOW_LARGE_ENV) == "1"
+        print(f"Pre-commit check {'skipped' if allowed else 'failed — could not scan'} "
+              f"files larger than {SCAN_MAX_BLOB_BYTES >> 20} MiB:")
+        for path in sorted(skipped):
+            print(f" - {path}")
+        if not allowed:
+            print(f"\nCheck them by hand, then commit with {ALLOW_LARGE_ENV}=1 to allow them.")
+            return 1
+
+    # Only blobs that were actually scanned (now or before) count as clean
+    save_clean_oids(clean, [oid for _path, oid in staged if oid in clean] + scanned_clean)
     return 0
 
 
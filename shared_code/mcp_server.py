@@ -4,66 +4,124 @@ This module contains the core MCP server functionality that can be used
 across different Azure Function triggers.
 """
 
-try:
-    from mcp.server.fastmcp import FastMCP
-    MCP_AVAILABLE = True
-except ImportError as e:
-    print(f"Warning: MCP not available: {e}")
-    MCP_AVAILABLE = False
-
-import math
+import bisect
+import contextlib
+import functools
 import os
 import json
-from typing import Dict, List, Union, Optional
+import queue
+import re
+import socket
+import threading
+import time
 import logging
 
-# Configure logging for Azure Functions
-logging.basicConfig(level=logging.INFO)
+# Prefer orjson when installed for encoding tool results; tools return str,
+# so its bytes output is decoded. Values JSON can't represent natively
+# (Decimal, datetime, ...) are stringified with str() by both encoders, so
+# results look the same whichever one is in use.
+try:
+    import orjson
+
+    def _dumps(data):
+        return orjson.dumps(data, default=str,
+                            option=orjson.OPT_PASSTHROUGH_DATETIME).decode('utf-8')
+except ImportError:
+    def _dumps(data):
+        return json.dumps(data, default=str)
+
+# Configure logging for Azure Functions; the Functions host installs its
+# own root handler, which is left alone
+if not logging.getLogger().handlers:
+    logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize MCP (Model Context Protocol) server instance with descriptive name
-if MCP_AVAILABLE:
-    try:
-        mcp = FastMCP("BMI & SQL Server - Azure Functions")
-        logger.info("FastMCP server initialized successfully")
-    except Exception as e:
-        logger.error(f"Failed to initialize FastMCP: {e}")
-        MCP_AVAILABLE = False
-        mcp = None
-else:
-    logger.error("MCP not available - FastMCP will not be initialized")
-    mcp = None
+# Tools and resources are recorded here at import and registered on the
+# FastMCP server when get_mcp() first builds it. FastMCP pulls in a large
+# import graph (pydantic, httpx, anyio, ...), so callers that only use the
+# plain functions below, or never reach MCP, don't pay for it on cold start.
+_PENDING_TOOLS = []
+_PENDING_RESOURCES = []
 
-# Create a dummy decorator for when MCP is not available
+# True/False once get_mcp() has tried to build the server, None before
+MCP_AVAILABLE = None
 
+_mcp_lock = threading.Lock()
 
-def dummy_tool(*args, **kwargs):
+
+def register_tool(func):
+    """Decorator: expose func as an MCP tool once the server is built"""
+    _PENDING_TOOLS.append(func)
+    return func
+
+
+def register_resource(uri):
+    """Decorator factory: expose the function as the MCP resource at uri"""
     def decorator(func):
-        logger.warning(
-            f"MCP not available - skipping tool registration for {func.__name__}")
+        _PENDING_RESOURCES.append((uri, func))
         return func
     return decorator
 
 
-# If MCP is not available, replace mcp.tool with dummy decorator
-if not MCP_AVAILABLE or mcp is None:
-    class DummyMCP:
-        def __init__(self):
-            pass
+class _DummyMCP:
+    """Stand-in server used when MCP is not available"""
+    __slots__ = ()
 
-        def tool(self, *args, **kwargs):
-            return dummy_tool(*args, **kwargs)
+    def list_tools(self):
+        return []
 
-        def resource(self, *args, **kwargs):
-            return dummy_tool(*args, **kwargs)
+    def call_tool(self, name, arguments):
+        raise Exception("MCP not available")
 
-        def list_tools(self):
-            return []
 
-        def call_tool(self, name, arguments):
-            raise Exception("MCP not available")
+def get_mcp():
+    """
+    Return the MCP server, building it and registering the tools on first use.
+
+    Also reachable as the module attribute ``mcp``, which is how the Azure
+    Function triggers import it. Falls back to a _DummyMCP (and sets
+    MCP_AVAILABLE to False) when FastMCP can't be imported or initialized.
+    """
+    global mcp, MCP_AVAILABLE
+    with _mcp_lock:
+        if MCP_AVAILABLE is not None:
+            return mcp
+
+        server = None
+        try:
+            from mcp.server.fastmcp import FastMCP
+        except ImportError as e:
+            print(f"Warning: MCP not available: {e}")
+            logger.error("MCP not available - FastMCP will not be initialized")
+        else:
+            # Initialize MCP (Model Context Protocol) server instance with descriptive name
+            try:
+                server = FastMCP("BMI & SQL Server - Azure Functions")
+                for uri, func in _PENDING_RESOURCES:
+                    server.resource(uri)(func)
+                for func in _PENDING_TOOLS:
+                    server.tool()(func)
+                logger.info("FastMCP server initialized successfully")
+            except Exception as e:
+                logger.error(f"Failed to initialize FastMCP: {e}")
+                server = None
+
+        if server is None:
+            logger.warning(
+                "MCP not available - skipping tool and resource registration")
+            server = _DummyMCP()
+
+        mcp = server
+        MCP_AVAILABLE = not isinstance(server, _DummyMCP)
+        return mcp
+
+
+def __getattr__(name):
+    # Module-level lazy attribute: shared_mcp.mcp builds the server on first access
+    if name == "mcp":
+        return get_mcp()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-    mcp = DummyMCP()
 
 # SQL Server Configuration - Use environment variables for Azure deployment security
 CURRENT_SQL_CONFIG = os.environ.get("SQL_CONFIG", "azure_production")
@@ -108,9 +166,58 @@ BMI_HEALTH_RISKS = {
     ]
 }
 
+# Lower bounds of each BMI category after the first; bisect_right() over
+# these indexes _BMI_BUCKETS, so a BMI exactly on a bound falls in the
+# higher category. Entries are (category, category_key, category_range).
+_BMI_THRESHOLDS = (18.5, 25.0, 30.0, 35.0, 40.0)
+_BMI_BUCKETS = (
+    ("Underweight", "underweight", "< 18.5"),
+    ("Normal weight", "normal", "18.5 - 24.9"),
+    ("Overweight", "overweight", "25.0 - 29.9"),
+    ("Obesity Class I", "obese", "30.0 - 34.9"),
+    ("Obesity Class II", "obese", "35.0 - 39.9"),
+    ("Obesity Class III", "obese", "≥ 40.0"),
+)
+
+# Parts of the calculate_bmi result that don't depend on the input. They
+# are shared by reference between results, which are only ever encoded.
+# All obesity classes report the Class I description.
+_BMI_INTERPRETATIONS = {
+    key: BMI_CATEGORIES.get(key.replace("obese", "obese_class_1"), {}).get("description", "")
+    for key in BMI_HEALTH_RISKS
+}
+_BMI_GENERAL_RECOMMENDATIONS = {
+    "lifestyle_focus": "Maintain a balanced diet and regular physical activity",
+    "monitoring": "Regular BMI monitoring can help track health progress"
+}
+_BMI_RESULT_RESOURCES = {
+    "categories": "bmi://categories",
+    "health_risks": "bmi://health-risks",
+    "calculation_guide": "bmi://calculation-guide",
+    "healthy_weight_tips": "bmi://healthy-weight-tips"
+}
+_BMI_ERROR_RESOURCES = {
+    "calculation_guide": "bmi://calculation-guide",
+    "categories": "bmi://categories"
+}
+_BMI_DISCLAIMER = "This BMI calculation is for informational purposes only and should not replace professional medical advice. Consult healthcare professionals for personalized health recommendations."
+
+
+# The resource payloads below are static, so each one is serialized once at
+# import and the resource functions and get_bmi_resources hand out the
+# cached strings.
+_BMI_CATEGORIES_RESOURCE = {
+    "title": "WHO BMI Categories and Ranges",
+    "description": "Official Body Mass Index categories as defined by the World Health Organization",
+    "last_updated": "2024",
+    "source": "World Health Organization",
+    "categories": BMI_CATEGORIES
+}
+_BMI_CATEGORIES_JSON = json.dumps(_BMI_CATEGORIES_RESOURCE, indent=2)
+
 
 # MCP Resources for BMI Calculator
-@mcp.resource("bmi://categories")
+@register_resource("bmi://categories")
 def bmi_categories_resource() -> str:
     """
     BMI Categories and Ranges Resource
@@ -119,16 +226,20 @@ def bmi_categories_resource() -> str:
     This resource contains the official BMI classification system used
     by healthcare professionals worldwide.
     """
-    return json.dumps({
-        "title": "WHO BMI Categories and Ranges",
-        "description": "Official Body Mass Index categories as defined by the World Health Organization",
-        "last_updated": "2024",
-        "source": "World Health Organization",
-        "categories": BMI_CATEGORIES
-    }, indent=2)
+    return _BMI_CATEGORIES_JSON
+
 
+_BMI_HEALTH_RISKS_RESOURCE = {
+    "title": "Health Risks Associated with BMI Categories",
+    "description": "Medical information about health risks for different BMI ranges",
+    "disclaimer": "This information is for educational purposes only and should not replace professional medical advice",
+    "last_updated": "2024",
+    "health_risks": BMI_HEALTH_RISKS
+}
+_BMI_HEALTH_RISKS_JSON = json.dumps(_BMI_HEALTH_RISKS_RESOURCE, indent=2)
 
-@mcp.resource("bmi://health-risks")
+
+@register_resource("bmi://health-risks")
 def bmi_health_risks_resource() -> str:
     """
     BMI Health Risks Resource
@@ -137,16 +248,51 @@ def bmi_health_risks_resource() -> str:
     This resource helps users understand the potential health implications
     of their BMI results.
     """
-    return json.dumps({
-        "title": "Health Risks Associated with BMI Categories",
-        "description": "Medical information about health risks for different BMI ranges",
-        "disclaimer": "This information is for educational purposes only and should not replace professional medical advice",
-        "last_updated": "2024",
-        "health_risks": BMI_HEALTH_RISKS
-    }, indent=2)
+    return _BMI_HEALTH_RISKS_JSON
+
+
+_BMI_CALCULATION_GUIDE_RESOURCE = {
+    "title": "BMI Calculation Guide",
+    "description": "Complete guide to calculating Body Mass Index",
+    "formula": {
+        "metric": "BMI = weight (kg) / height (m)²",
+        "imperial": "BMI = (weight (lbs) / height (inches)²) × 703"
+    },
+    "unit_conversions": {
+        "weight": {
+            "pounds_to_kg": "pounds ÷ 2.205",
+            "kg_to_pounds": "kg × 2.205"
+        },
+        "height": {
+            "inches_to_meters": "inches × 0.0254",
+            "feet_inches_to_meters": "(feet × 12 + inches) × 0.0254",
+            "cm_to_meters": "cm ÷ 100"
+        }
+    },
+    "examples": [
+        {
+            "description": "Person weighing 70kg and 1.75m tall",
+            "calculation": "70 ÷ (1.75)² = 70 ÷ 3.0625 = 22.86",
+            "category": "Normal weight"
+        },
+        {
+            "description": "Person weighing 154lbs and 5'9\" tall",
+            "calculation": "(154 ÷ 69²) × 703 = (154 ÷ 4761) × 703 = 22.74",
+            "category": "Normal weight"
+        }
+    ],
+    "limitations": [
+        "Does not distinguish between muscle and fat mass",
+        "May not be accurate for athletes with high muscle mass",
+        "Age and gender are not considered",
+        "May not be suitable for pregnant women",
+        "Children and adolescents require different calculations"
+    ]
+}
+_BMI_CALCULATION_GUIDE_JSON = json.dumps(_BMI_CALCULATION_GUIDE_RESOURCE, indent=2)
 
 
-@mcp.resource("bmi://calculation-guide")
+@register_resource("bmi://calculation-guide")
 def bmi_calculation_guide_resource() -> str:
     """
     BMI Calculation Guide Resource
@@ -154,49 +300,61 @@ def bmi_calculation_guide_resource() -> str:
     Provides detailed information about BMI calculation methods,
     formula explanation, and unit conversions.
     """
-    guide = {
-        "title": "BMI Calculation Guide",
-        "description": "Complete guide to calculating Body Mass Index",
-        "formula": {
-            "metric": "BMI = weight (kg) / height (m)²",
-            "imperial": "BMI = (weight (lbs) / height (inches)²) × 703"
-        },
-        "unit_conversions": {
-            "weight": {
-                "pounds_to_kg": "pounds ÷ 2.205",
-                "kg_to_pounds": "kg × 2.205"
-            },
-            "height": {
-                "inches_to_meters": "inches × 0.0254",
-                "feet_inches_to_meters": "(feet × 12 + inches) × 0.0254",
-                "cm_to_meters": "cm ÷ 100"
-            }
-        },
-        "examples": [
-            {
-                "description": "Person weighing 70kg and 1.75m tall",
-                "calculation": "70 ÷ (1.75)² = 70 ÷ 3.0625 = 22.86",
-                "category": "Normal weight"
-            },
-            {
-                "description": "Person weighing 154lbs and 5'9\" tall",
-                "calculation": "(154 ÷ 69²) × 703 = (154 ÷ 4761) × 703 = 22.74",
-                "category": "Normal weight"
-            }
+    return _BMI_CALCULATION_GUIDE_JSON
+
+
+_BMI_HEALTHY_WEIGHT_TIPS_RESOURCE = {
+    "title": "Healthy Weight Management Tips",
+    "description": "Evidence-based recommendations for achieving and maintaining a healthy weight",
+    "general_tips": [
+        "Eat a balanced diet rich in fruits, vegetables, whole grains, and lean proteins",
+        "Stay hydrated by drinking plenty of water throughout the day",
+        "Engage in regular physical activity (at least 150 minutes of moderate exercise per week)",
+        "Get adequate sleep (7-9 hours per night for adults)",
+        "Manage stress through healthy coping mechanisms",
+        "Monitor portion sizes and practice mindful eating"
+    ],
+    "category_specific_advice": {
+        "underweight": [
+            "Consult with a healthcare provider to rule out underlying conditions",
+            "Focus on nutrient-dense, calorie-rich foods",
+            "Include healthy fats like nuts, avocados, and olive oil",
+            "Consider strength training to build muscle mass",
+            "Eat frequent, smaller meals throughout the day"
+        ],
+        "normal": [
+            "Maintain current healthy habits",
+            "Continue regular exercise routine",
+            "Monitor weight regularly but don't obsess",
+            "Focus on overall health rather than just weight"
+        ],
+        "overweight": [
+            "Create a modest caloric deficit through diet and exercise",
+            "Increase physical activity gradually",
+            "Focus on sustainable lifestyle changes",
+            "Consider working with a registered dietitian",
+            "Track food intake to identify patterns"
         ],
-        "limitations": [
-            "Does not distinguish between muscle and fat mass",
-            "May not be accurate for athletes with high muscle mass",
-            "Age and gender are not considered",
-            "May not be suitable for pregnant women",
-            "Children and adolescents require different calculations"
+        "obese": [
+            "Consult with healthcare professionals for a comprehensive plan",
+            "Consider medical evaluation for weight-related health conditions",
+            "Focus on gradual, sustainable weight loss (1-2 pounds per week)",
+            "May benefit from structured weight loss programs",
+            "Address emotional and behavioral factors related to eating"
         ]
-    }
-
-    return json.dumps(guide, indent=2)
+    },
+    "when_to_seek_help": [
+        "BMI below 18.5 or above 30",
+        "Rapid unexplained weight changes",
+        "Difficulty losing weight despite lifestyle changes",
+        "Weight-related health problems",
+        "Eating disorders or unhealthy relationships with food"
+    ]
+}
+_BMI_HEALTHY_WEIGHT_TIPS_JSON = json.dumps(_BMI_HEALTHY_WEIGHT_TIPS_RESOURCE, indent=2)
 
 
-@mcp.resource("bmi://healthy-weight-tips")
+@register_resource("bmi://healthy-weight-tips")
 def bmi_healthy_weight_tips_resource() -> str:
     """
     Healthy Weight Management Tips Resource
@@ -204,58 +362,138 @@ def bmi_healthy_weight_tips_resource() -> str:
     Provides evidence-based tips for maintaining a healthy weight
     and improving overall health across different BMI categories.
     """
-    tips = {
-        "title": "Healthy Weight Management Tips",
-        "description": "Evidence-based recommendations for achieving and maintaining a healthy weight",
-        "general_tips": [
-            "Eat a balanced diet rich in fruits, vegetables, whole grains, and lean proteins",
-            "Stay hydrated by drinking plenty of water throughout the day",
-            "Engage in regular physical activity (at least 150 minutes of moderate exercise per week)",
-            "Get adequate sleep (7-9 hours per night for adults)",
-            "Manage stress through healthy coping mechanisms",
-            "Monitor portion sizes and practice mindful eating"
-        ],
-        "category_specific_advice": {
-            "underweight": [
-                "Consult with a healthcare provider to rule out underlying conditions",
-                "Focus on nutrient-dense, calorie-rich foods",
-                "Include healthy fats like nuts, avocados, and olive oil",
-                "Consider strength training to build muscle mass",
-                "Eat frequent, smaller meals throughout the day"
-            ],
-            "normal": [
-                "Maintain current healthy habits",
-                "Continue regular exercise routine",
-                "Monitor weight regularly but don't obsess",
-                "Focus on overall health rather than just weight"
-            ],
-            "overweight": [
-                "Create a modest caloric deficit through diet and exercise",
-                "Increase physical activity gradually",
-                "Focus on sustainable lifestyle changes",
-                "Consider working with a registered dietitian",
-                "Track food intake to identify patterns"
-            ],
-            "obese": [
-                "Consult with healthcare professionals for a comprehensive plan",
-                "Consider medical evaluation for weight-related health conditions",
-                "Focus on gradual, sustainable weight loss (1-2 pounds per week)",
-                "May benefit from structured weight loss programs",
-                "Address emotional and behavioral factors related to eating"
-            ]
-        },
-        "when_to_seek_help": [
-            "BMI below 18.5 or above 30",
-            "Rapid unexplained weight changes",
-            "Difficulty losing weight despite lifestyle changes",
-            "Weight-related health problems",
-            "Eating disorders or unhealthy relationships with food"
-        ]
-    }
+    return _BMI_HEALTHY_WEIGHT_TIPS_JSON
+
+
+_BMI_RESOURCE_URIS = [
+    "bmi://categories",
+    "bmi://health-risks",
+    "bmi://calculation-guide",
+    "bmi://healthy-weight-tips"
+]
+
+_ALL_BMI_JSON = json.dumps({
+    "bmi_resources": {
+        "categories": _BMI_CATEGORIES_RESOURCE,
+        "health_risks": _BMI_HEALTH_RISKS_RESOURCE,
+        "calculation_guide": _BMI_CALCULATION_GUIDE_RESOURCE,
+        "healthy_weight_tips": _BMI_HEALTHY_WEIGHT_TIPS_RESOURCE
+    },
+    "resource_uris": _BMI_RESOURCE_URIS
+}, indent=2)
+
+# get_bmi_resources resource_type -> serialized resource
+_RESOURCE_MAP = {
+    "all": _ALL_BMI_JSON,
+    "categories": _BMI_CATEGORIES_JSON,
+    "health-risks": _BMI_HEALTH_RISKS_JSON,
+    "calculation-guide": _BMI_CALCULATION_GUIDE_JSON,
+    "healthy-weight-tips": _BMI_HEALTHY_WEIGHT_TIPS_JSON
+}
+
+
+# pyodbc (and its ODBC driver manager) is only loaded when a SQL tool first
+# runs, keeping it off the cold-start path; later calls reuse the module.
+_pyodbc = None
+
+
+def _get_pyodbc():
+    """Import pyodbc on first use and return the cached module"""
+    global _pyodbc
+    if _pyodbc is None:
+        import pyodbc as _pyodbc_mod
+        # Let the ODBC driver manager cache handles keyed by connection
+        # string. Must be set before the first pyodbc.connect() call.
+        _pyodbc_mod.pooling = True
+        _pyodbc = _pyodbc_mod
+    return _pyodbc
 
-    return json.dumps(tips, indent=2)
 
+# Instance-wide pool of live connections so warm invocations reuse an
+# already authenticated session instead of repeating the TLS handshake and
+# Azure AD token exchange on every call
+SQL_POOL_SIZE = 10
+_connection_pool = queue.Queue(maxsize=SQL_POOL_SIZE)
 
+
+def _release_conn(cnxn):
+    """Return a healthy connection to the pool, closing it if the pool is full"""
+    try:
+        _connection_pool.put_nowait(cnxn)
+    except queue.Full:
+        cnxn.close()
+
+
+def _discard_conn(cnxn):
+    """Close a connection that failed; it may already be dead"""
+    with contextlib.suppress(Exception):
+        cnxn.close()
+
+
+def _is_connection_error(error):
+    """
+    True when a driver error means the connection itself is unusable.
+
+    Covers pyodbc's OperationalError/InterfaceError and the SQLSTATE
+    classes for a lost link (08xxx) or a timeout (HYT00). Errors in the SQL
+    itself (bad syntax, missing table, ...) leave the connection healthy.
+    """
+    pyodbc = _get_pyodbc()
+    if isinstance(error, (pyodbc.OperationalError, pyodbc.InterfaceError)):
+        return True
+    if not isinstance(error, pyodbc.Error) or not error.args:
+        return False
+    sqlstate = error.args[0]
+    return isinstance(sqlstate, str) and (sqlstate.startswith("08") or sqlstate == "HYT00")
+
+
+def run_pooled(work):
+    """
+    Run work(cnxn) on a pooled SQL Server connection and return its result.
+
+    An idle pooled connection can go stale (Azure SQL drops idle sessions,
+    Managed Identity tokens expire). If work fails on one with a
+    connection-level error, that connection is discarded and work runs once
+    more on a freshly opened connection. The tools only read, so the retry
+    is safe. Any other error returns the connection to the pool and is
+    raised unchanged.
+    """
+    pyodbc = _get_pyodbc()
+    try:
+        cnxn = _connection_pool.get_nowait()
+    except queue.Empty:
+        cnxn = None
+
+    if cnxn is not None:
+        try:
+            result = work(cnxn)
+        except Exception as e:
+            if not _is_connection_error(e):
+                _release_conn(cnxn)
+                raise
+            _discard_conn(cnxn)
+            logger.warning(
+                f"Pooled SQL connection failed, retrying on a new connection: {str(e)}")
+        else:
+            _release_conn(cnxn)
+            return result
+
+    # Autocommit: the tools only read, and a pooled connection must not
+    # sit in an open transaction between calls
+    cnxn = pyodbc.connect(get_connection_string(), autocommit=True)
+    try:
+        result = work(cnxn)
+    except Exception as e:
+        if _is_connection_error(e):
+            _discard_conn(cnxn)
+        else:
+            _release_conn(cnxn)
+        raise
+    _release_conn(cnxn)
+    return result
+
+
+@functools.lru_cache(maxsize=1)
 def get_sql_config():
     """
     Get SQL configuration from environment variables
@@ -264,6 +502,10 @@ def get_sql_config():
     loaded from Azure Functions application settings (environment variables).
     This approach follows security best practices by avoiding hardcoded credentials.
 
+    Application settings are fixed for the lifetime of a function instance,
+    so the result is computed once; callers must treat it as read-only.
+    Call get_sql_config.cache_clear() after changing the environment.
+
     Returns:
         dict: SQL Server configuration parameters
     """
@@ -281,6 +523,19 @@ def get_sql_config():
     }
 
 
+# Connection string suffix for each credential-free authentication type;
+# SqlPassword (and unknown types) append UID/PWD instead
+_AUTH_SUFFIXES = {
+    # Use Azure Managed Identity (recommended for Azure Functions)
+    'ActiveDirectoryMsi': "Authentication=ActiveDirectoryMsi;",
+    # Use Windows Authentication
+    'ActiveDirectoryIntegrated': "Authentication=ActiveDirectoryIntegrated;",
+    # Use interactive Azure AD authentication (not suitable for Azure Functions)
+    'ActiveDirectoryInteractive': "Authentication=ActiveDirectoryInteractive;",
+}
+
+
+@functools.lru_cache(maxsize=1)
 def get_connection_string(use_tcp=True) -> str:
     """
     Generate SQL Server connection string from environment variables
@@ -296,6 +551,8 @@ def get_connection_string(use_tcp=True) -> str:
 
     Returns:
         str: Formatted ODBC connection string
+
+    Cached like get_sql_config(); clear both caches together.
     """
     config = get_sql_config()
     auth_type = config['authentication']
@@ -310,45 +567,21 @@ def get_connection_string(use_tcp=True) -> str:
         f"Connection Timeout={config['timeout']};"
     )
 
-    if auth_type == 'ActiveDirectoryMsi':
-        # Use Azure Managed Identity (recommended for Azure Functions)
-        connection_string = (
-            base_params +
-            "Authentication=ActiveDirectoryMsi;"
-        )
-    elif auth_type == 'SqlPassword':
+    suffix = _AUTH_SUFFIXES.get(auth_type)
+    if suffix is None:
+        if auth_type != 'SqlPassword':
+            # Fallback to SQL authentication for unknown types
+            logger.warning(
+                f"Unknown authentication type: {auth_type}. Falling back to SQL authentication.")
         # Use SQL Server Authentication with username/password
-        connection_string = (
-            base_params +
+        suffix = (
             f"UID={config['username']};"
             f"PWD={config['password']};"
         )
-    elif auth_type == 'ActiveDirectoryIntegrated':
-        # Use Windows Authentication
-        connection_string = (
-            base_params +
-            "Authentication=ActiveDirectoryIntegrated;"
-        )
-    elif auth_type == 'ActiveDirectoryInteractive':
-        # Use interactive Azure AD authentication (not suitable for Azure Functions)
-        connection_string = (
-            base_params +
-            "Authentication=ActiveDirectoryInteractive;"
-        )
-    else:
-        # Fallback to SQL authentication for unknown types
-        logger.warning(
-            f"Unknown authentication type: {auth_type}. Falling back to SQL authentication.")
-        connection_string = (
-            base_params +
-            f"UID={config['username']};"
-            f"PWD={config['password']};"
-        )
-
-    return connection_string
+    return base_params + suffix
 
 
-@mcp.tool()
+@register_tool
 def calculate_bmi(weight_kg: float, height_m: float) -> str:
     """
     Calculate BMI given weight in kilograms and height in meters
@@ -377,48 +610,24 @@ def calculate_bmi(weight_kg: float, height_m: float) -> str:
                 "error": "Height and weight must be positive numbers",
                 "weight_kg": weight_kg,
                 "height_m": height_m,
-                "resources": {
-                    "calculation_guide": "bmi://calculation-guide",
-                    "categories": "bmi://categories"
-                }
+                "resources": _BMI_ERROR_RESOURCES
             }
-            return json.dumps(result, indent=2)
+            return _dumps(result)
 
         # Calculate BMI using standard formula
-        bmi = weight_kg / (height_m ** 2)
+        height_sq = height_m * height_m
+        bmi = weight_kg / height_sq
 
         # Determine detailed BMI category
-        if bmi < 18.5:
-            category = "Underweight"
-            category_key = "underweight"
-            category_range = "< 18.5"
-        elif bmi < 25:
-            category = "Normal weight"
-            category_key = "normal"
-            category_range = "18.5 - 24.9"
-        elif bmi < 30:
-            category = "Overweight"
-            category_key = "overweight"
-            category_range = "25.0 - 29.9"
-        elif bmi < 35:
-            category = "Obesity Class I"
-            category_key = "obese"
-            category_range = "30.0 - 34.9"
-        elif bmi < 40:
-            category = "Obesity Class II"
-            category_key = "obese"
-            category_range = "35.0 - 39.9"
-        else:
-            category = "Obesity Class III"
-            category_key = "obese"
-            category_range = "≥ 40.0"
+        category, category_key, category_range = _BMI_BUCKETS[
+            bisect.bisect_right(_BMI_THRESHOLDS, bmi)]
 
         # Get health risks for the category
         health_risks = BMI_HEALTH_RISKS.get(category_key, [])
 
         # Calculate healthy weight range for the person's height
-        healthy_min = 18.5 * (height_m ** 2)
-        healthy_max = 24.9 * (height_m ** 2)
+        healthy_min = round(18.5 * height_sq, 1)
+        healthy_max = round(24.9 * height_sq, 1)
 
         # Prepare comprehensive result with all relevant information
         result = {
@@ -429,29 +638,23 @@ def calculate_bmi(weight_kg: float, height_m: float) -> str:
             "height_m": height_m,
             "calculation": f"{weight_kg} / ({height_m})² = {bmi:.2f}",
             "healthy_weight_range": {
-                "min_kg": round(healthy_min, 1),
-                "max_kg": round(healthy_max, 1),
-                "description": f"For your height ({height_m}m), a healthy weight range is {round(healthy_min, 1)}-{round(healthy_max, 1)} kg"
+                "min_kg": healthy_min,
+                "max_kg": healthy_max,
+                "description": f"For your height ({height_m}m), a healthy weight range is {healthy_min}-{healthy_max} kg"
             },
             "health_information": {
                 "risks": health_risks,
-                "interpretation": BMI_CATEGORIES.get(category_key.replace("obese", "obese_class_1"), {}).get("description", "")
+                "interpretation": _BMI_INTERPRETATIONS[category_key]
             },
             "recommendations": {
                 "consult_healthcare": bmi < 18.5 or bmi >= 30,
-                "lifestyle_focus": "Maintain a balanced diet and regular physical activity",
-                "monitoring": "Regular BMI monitoring can help track health progress"
-            },
-            "resources": {
-                "categories": "bmi://categories",
-                "health_risks": "bmi://health-risks",
-                "calculation_guide": "bmi://calculation-guide",
-                "healthy_weight_tips": "bmi://healthy-weight-tips"
+                **_BMI_GENERAL_RECOMMENDATIONS
             },
-            "disclaimer": "This BMI calculation is for informational purposes only and should not replace professional medical advice. Consult healthcare professionals for personalized health recommendations."
+            "resources": _BMI_RESULT_RESOURCES,
+            "disclaimer": _BMI_DISCLAIMER
         }
 
-        return json.dumps(result, indent=2)
+        return _dumps(result)
 
     except Exception as e:
         # Handle any unexpected errors gracefully
@@ -459,15 +662,12 @@ def calculate_bmi(weight_kg: float, height_m: float) -> str:
             "error": str(e),
             "weight_kg": weight_kg,
             "height_m": height_m,
-            "resources": {
-                "calculation_guide": "bmi://calculation-guide",
-                "categories": "bmi://categories"
-            }
+            "resources": _BMI_ERROR_RESOURCES
         }
-        return json.dumps(result, indent=2)
+        return _dumps(result)
 
 
-@mcp.tool()
+@register_tool
 def get_bmi_resources(resource_type: str = "all") -> str:
     """
     Get BMI-related resources and information
@@ -487,54 +687,44 @@ def get_bmi_resources(resource_type: str = "all") -> str:
         JSON string with requested BMI resource information
     """
     try:
-        if resource_type == "categories":
-            return bmi_categories_resource()
-        elif resource_type == "health-risks":
-            return bmi_health_risks_resource()
-        elif resource_type == "calculation-guide":
-            return bmi_calculation_guide_resource()
-        elif resource_type == "healthy-weight-tips":
-            return bmi_healthy_weight_tips_resource()
-        elif resource_type == "all":
-            # Return all resources in a structured format
-            all_resources = {
-                "bmi_resources": {
-                    "categories": json.loads(bmi_categories_resource()),
-                    "health_risks": json.loads(bmi_health_risks_resource()),
-                    "calculation_guide": json.loads(bmi_calculation_guide_resource()),
-                    "healthy_weight_tips": json.loads(bmi_healthy_weight_tips_resource())
-                },
-                "resource_uris": [
-                    "bmi://categories",
-                    "bmi://health-risks",
-                    "bmi://calculation-guide",
-                    "bmi://healthy-weight-tips"
-                ]
-            }
-            return json.dumps(all_resources, indent=2)
-        else:
-            # Invalid resource type
-            result = {
-                "error": f"Invalid resource type: {resource_type}",
-                "valid_types": ["all", "categories", "health-risks", "calculation-guide", "healthy-weight-tips"],
-                "available_resources": [
-                    "bmi://categories",
-                    "bmi://health-risks",
-                    "bmi://calculation-guide",
-                    "bmi://healthy-weight-tips"
-                ]
-            }
-            return json.dumps(result, indent=2)
+        resource_json = _RESOURCE_MAP.get(resource_type)
+        if resource_json is not None:
+            return resource_json
+
+        # Invalid resource type
+        result = {
+            "error": f"Invalid resource type: {resource_type}",
+            "valid_types": list(_RESOURCE_MAP),
+            "available_resources": _BMI_RESOURCE_URIS
+        }
+        return _dumps(result)
 
     except Exception as e:
         result = {
             "error": str(e),
             "resource_type": resource_type
         }
-        return json.dumps(result, indent=2)
+        return _dumps(result)
+
+
+def _sql_error_details():
+    """Connection details reported by the SQL tools' error results"""
+    config = get_sql_config()
+    connection_string = get_connection_string()
+    password = config['password']
+    return {
+        "server": config['server'],
+        "database": config['database'],
+        "authentication_type": config['authentication'],
+        "connection_string_sample": connection_string.replace(password, '***') if password else connection_string
+    }
+
 
+# Upper bound on the TCP connect in test_network_connectivity
+NETWORK_PROBE_TIMEOUT = 10  # seconds
 
-@mcp.tool()
+
+@register_tool
 def test_network_connectivity() -> str:
     """
     Test network connectivity to the SQL Server
@@ -546,9 +736,6 @@ def test_network_connectivity() -> str:
     Returns:
         JSON string with connectivity test results including response time
     """
-    import socket
-    import time
-
     config = get_sql_config()
     server_host = config['server']
     port = 1433  # Default SQL Server port
@@ -563,35 +750,31 @@ def test_network_connectivity() -> str:
     }
 
     try:
-        # Perform TCP connection test with timing
-        start_time = time.time()
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(10)  # 10 second timeout to prevent hanging
-
-        # Attempt connection (non-blocking test)
-        connection_result = sock.connect_ex((server_host, port))
-        end_time = time.time()
-
-        # Clean up socket connection
-        sock.close()
-
-        if connection_result == 0:
-            # Connection successful
-            result["reachable"] = True
-            result["response_time_ms"] = round(
-                (end_time - start_time) * 1000, 2)
+        # Perform TCP connection test with timing. create_connection tries
+        # every address the name resolves to (IPv6 and IPv4), not just IPv4
+        start_time = time.perf_counter()
+        with socket.create_connection((server_host, port),
+                                      timeout=NETWORK_PROBE_TIMEOUT):
+            end_time = time.perf_counter()
+
+        # Connection successful
+        result["reachable"] = True
+        result["response_time_ms"] = round(
+            (end_time - start_time) * 1000, 2)
+
+    except TimeoutError:
+        result["error"] = f"Connection timed out after {NETWORK_PROBE_TIMEOUT}s"
+    except OSError as e:
+        # Connection refused, unreachable, DNS resolution failure, ...
+        if e.errno:
+            result["error"] = f"Connection failed with code: {e.errno} ({e.strerror})"
         else:
-            # Connection failed
-            result["error"] = f"Connection failed with code: {connection_result}"
+            result["error"] = str(e)
 
-    except Exception as e:
-        # Handle network errors (DNS resolution, etc.)
-        result["error"] = str(e)
-
-    return json.dumps(result, indent=2)
+    return _dumps(result)
 
 
-@mcp.tool()
+@register_tool
 def test_sql_connection() -> str:
     """
     Test the SQL Server connection and return connection status
@@ -604,20 +787,25 @@ def test_sql_connection() -> str:
         JSON string with connection status and server information
     """
     try:
-        import pyodbc
-        connection_string = get_connection_string()
+        config = get_sql_config()
 
         logger.info(
-            f"Testing connection with authentication: {get_sql_config()['authentication']}")
+            f"Testing connection with authentication: {config['authentication']}")
+
+        def fetch_server_info(cnxn):
+            cursor = cnxn.cursor()
 
-        # Establish database connection
-        cnxn = pyodbc.connect(connection_string)
-        cursor = cnxn.cursor()
+            # Execute test query to verify connection and get server info
+            cursor.execute(
+                "SELECT @@VERSION as server_version, DB_NAME() as database_name")
+            row = cursor.fetchone()
 
-        # Execute test query to verify connection and get server info
-        cursor.execute(
-            "SELECT @@VERSION as server_version, DB_NAME() as database_name")
-        row = cursor.fetchone()
+            # The cursor is done; the connection goes back to the pool
+            cursor.close()
+            return row
+
+        # Run it on a pooled database connection
+        row = run_pooled(fetch_server_info)
 
         # Prepare success result with server information
         result = {
@@ -625,33 +813,35 @@ def test_sql_connection() -> str:
             "connected": True,
             "server_version": str(row[0]) if row else "Unknown",
             "database_name": str(row[1]) if row else "Unknown",
-            "server": get_sql_config()['server'],
-            "database": get_sql_config()['database'],
-            "authentication_type": get_sql_config()['authentication']
+            "server": config['server'],
+            "database": config['database'],
+            "authentication_type": config['authentication']
         }
-
-        # Clean up database resources
-        cursor.close()
-        cnxn.close()
-        return json.dumps(result, indent=2)
+        return _dumps(result)
 
     except Exception as e:
         # Handle connection errors (authentication, network, etc.)
         logger.error(f"SQL connection test failed: {str(e)}")
-        config = get_sql_config()
         result = {
             "status": "error",
             "connected": False,
             "error": str(e),
-            "server": config['server'],
-            "database": config['database'],
-            "authentication_type": config['authentication'],
-            "connection_string_sample": get_connection_string().replace(config.get('password', ''), '***') if config.get('password') else get_connection_string()
+            **_sql_error_details()
         }
-        return json.dumps(result, indent=2)
+        return _dumps(result)
+
+
+# query_sql_server guards, matched case-insensitively against the raw query
+# in one pass each; whole words only, so columns like UPDATED_AT are allowed
+_SELECT_RE = re.compile(r"\s*SELECT\b", re.IGNORECASE)
+_DANGEROUS_RE = re.compile(
+    r"\b(?:DROP|DELETE|INSERT|UPDATE|ALTER|CREATE|TRUNCATE)\b", re.IGNORECASE)
+
+# Rows pulled from the cursor per fetchmany() round
+QUERY_FETCH_BATCH = 1000
 
 
-@mcp.tool()
+@register_tool
 def query_sql_server(query: str) -> str:
     """
     Executes a read-only SQL SELECT query against a SQL Server database
@@ -669,55 +859,47 @@ def query_sql_server(query: str) -> str:
         JSON string with query results or error information
     """
     # Security validation - only allow SELECT statements
-    query_trimmed = query.strip().upper()
-    if not query_trimmed.startswith('SELECT'):
-        return json.dumps({"error": "Only SELECT queries are allowed for security reasons"}, indent=2)
+    if not _SELECT_RE.match(query):
+        return _dumps({"error": "Only SELECT queries are allowed for security reasons"})
 
     # Additional security check - block dangerous SQL keywords
-    dangerous_keywords = ['DROP', 'DELETE', 'INSERT',
-                          'UPDATE', 'ALTER', 'CREATE', 'TRUNCATE']
-    if any(keyword in query_trimmed for keyword in dangerous_keywords):
-        return json.dumps({"error": "Query contains potentially dangerous keywords. Only SELECT queries are allowed."}, indent=2)
+    if _DANGEROUS_RE.search(query):
+        return _dumps({"error": "Query contains potentially dangerous keywords. Only SELECT queries are allowed."})
 
     try:
-        import pyodbc
-        connection_string = get_connection_string()
+        config = get_sql_config()
 
         logger.info(
-            f"Attempting to connect with authentication: {get_sql_config()['authentication']}")
-
-        # Establish database connection
-        cnxn = pyodbc.connect(connection_string)
-        cursor = cnxn.cursor()
-
-        # Execute the user-provided query
-        cursor.execute(query)
-
-        # Extract column names from cursor metadata
-        columns = [column[0]
-                   for column in cursor.description] if cursor.description else []
-
-        # Fetch and process all results
-        results = []
-        rows = cursor.fetchall()
-
-        for row in rows:
-            # Convert each row to a dictionary for JSON serialization
-            row_dict = {}
-            for i, value in enumerate(row):
-                # Handle different data types appropriately
-                if value is None:
-                    row_dict[columns[i]] = None
-                elif isinstance(value, (int, float, str, bool)):
-                    row_dict[columns[i]] = value
-                else:
-                    # Convert complex types to string representation
-                    row_dict[columns[i]] = str(value)
-            results.append(row_dict)
-
-        # Clean up database resources
-        cursor.close()
-        cnxn.close()
+            f"Attempting to connect with authentication: {config['authentication']}")
+
+        def run_query(cnxn):
+            cursor = cnxn.cursor()
+
+            # Execute the user-provided query
+            cursor.execute(query)
+            # Larger blocks per fetchmany() mean fewer round-trips to the server
+            cursor.arraysize = QUERY_FETCH_BATCH
+
+            # Extract column names from cursor metadata
+            columns = [column[0]
+                       for column in cursor.description] if cursor.description else []
+
+            # Fetch the results batch by batch as column -> value dicts, so
+            # only one batch of driver rows is alive next to the dicts; complex
+            # types (Decimal, datetime, ...) are stringified by _dumps
+            results = []
+            while True:
+                rows = cursor.fetchmany(QUERY_FETCH_BATCH)
+                if not rows:
+                    break
+                results.extend([dict(zip(columns, row)) for row in rows])
+
+            # The cursor is done; the connection goes back to the pool
+            cursor.close()
+            return columns, results
+
+        # Run it on a pooled database connection
+        columns, results = run_pooled(run_query)
 
         # Prepare successful result with metadata and data
         result = {
@@ -725,27 +907,23 @@ def query_sql_server(query: str) -> str:
             "row_count": len(results),
             "columns": columns,
             "data": results,
-            "authentication_used": get_sql_config()['authentication']
+            "authentication_used": config['authentication']
         }
-        return json.dumps(result, indent=2)
+        return _dumps(result)
 
     except Exception as e:
         # Handle query execution errors
         logger.error(f"SQL query failed: {str(e)}")
-        config = get_sql_config()
         result = {
             "status": "error",
             "error": str(e),
             "query": query,
-            "server": config['server'],
-            "database": config['database'],
-            "authentication_type": config['authentication'],
-            "connection_string_sample": get_connection_string().replace(config.get('password', ''), '***') if config.get('password') else get_connection_string()
+            **_sql_error_details()
         }
-        return json.dumps(result, indent=2)
+        return _dumps(result)
 
 
-@mcp.tool()
+@register_tool
 def get_sql_config_debug() -> str:
     """
     Get detailed SQL Server configuration for debugging
@@ -798,10 +976,10 @@ def get_sql_config_debug() -> str:
         }
     }
 
-    return json.dumps(result, indent=2)
+    return _dumps(result)
 
 
-@mcp.tool()
+@register_tool
 def get_server_info() -> str:
     """
     Get Azure Functions server information and environment details
@@ -828,10 +1006,10 @@ def get_server_info() -> str:
         }
     }
 
-    return json.dumps(result, indent=2)
+    return _dumps(result)
 
 
-@mcp.tool()
+@register_tool
 def greet(name: str) -> str:
     """
     Get a personalized greeting from Azure Functions
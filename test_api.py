@@ -17,10 +17,14 @@ def test_server():
     print("🧪 Testing MCP BMI Calculator API")
     print("=" * 50)
 
+    # One pooled session so every request reuses the server's keep-alive
+    # connection instead of opening a new TCP socket per call
+    session = requests.Session()
+
     try:
         # Test 1: GET endpoint - Server info
         print("1. Testing GET endpoint (server info)...")
-        response = requests.get(base_url, timeout=10)
+        response = session.get(base_url, timeout=10)
         if response.status_code == 200:
             data = response.json()
             print(f"   ✅ Server Status: {data.get('status', 'Unknown')}")
@@ -48,7 +52,7 @@ def test_server():
             }
         }
 
-        response = requests.post(
+        response = session.post(
             base_url,
             json=bmi_request,
             headers={"Content-Type": "application/json"},
@@ -87,7 +91,7 @@ def test_server():
             }
         }
 
-        response = requests.post(
+        response = session.post(
             base_url,
             json=resource_request,
             headers={"Content-Type": "application/json"},
@@ -108,7 +112,7 @@ def test_server():
             "arguments": {}
         }
 
-        response = requests.post(
+        response = session.post(
             base_url,
             json=error_request,
             headers={"Content-Type": "application/json"},
@@ -133,6 +137,8 @@ def test_server():
     except Exception as e:
         print(f"❌ Test Error: {e}")
         return False
+    finally:
+        session.close()
 
 
 def create_postman_collection():
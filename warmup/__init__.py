@@ -0,0 +1,46 @@
+import azure.functions as func
+import logging
+import os
+import sys
+
+# Same single absolute shared_code entry the HTTP functions use
+shared_code_path = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..', 'shared_code'))
+if shared_code_path not in sys.path:
+    sys.path.insert(0, shared_code_path)
+
+
+def _read_into_page_cache(root):
+    """Read every .py/.pyc file under root so later imports don't wait on disk"""
+    file_count = 0
+    for dirpath, _dirnames, filenames in os.walk(root):
+        for filename in filenames:
+            if filename.endswith(('.py', '.pyc')):
+                try:
+                    with open(os.path.join(dirpath, filename), 'rb') as f:
+                        f.read()
+                    file_count += 1
+                except OSError:
+                    pass
+    return file_count
+
+
+def main(warmupContext: func.Context) -> None:
+    """
+    Azure Functions warmup trigger
+
+    Runs when a new instance is added, before it receives traffic. Pulls the
+    shared_code sources into the OS page cache and builds the shared MCP
+    server (FastMCP is otherwise constructed on first use) so the first real
+    request finds it ready.
+    """
+    file_count = _read_into_page_cache(shared_code_path)
+
+    try:
+        import mcp_server
+        mcp_server.get_mcp()
+        logging.info(
+            f"Warmup complete: read {file_count} shared_code files, MCP server imported")
+    except ImportError as e:
+        logging.warning(
+            f"Warmup read {file_count} shared_code files but MCP import failed: {e}")